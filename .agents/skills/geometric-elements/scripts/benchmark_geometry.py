@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Geometry Microbenchmark
+Compare SVG-string path building (parse_path) with the geometry module.
+
+Usage:
+    python scripts/benchmark_geometry.py
+    python scripts/benchmark_geometry.py --sides 6 64 1024 --rings 8 128 --repeat 5
+"""
+
+import argparse
+import math
+import sys
+import timeit
+
+try:
+    import pixie
+except ImportError:
+    print("Error: pixie-python not installed. Run: pip install pixie-python")
+    sys.exit(1)
+
+from geometry import TOP, polygon_path, regular_points, star_path
+
+
+def legacy_polygon(cx, cy, radius, sides, rotation):
+    """Polygon built the way generate.py used to: trig per vertex + SVG text."""
+    points = []
+    for i in range(sides):
+        angle = (2 * math.pi / sides) * i + rotation
+        points.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+    path_str = f"M {points[0][0]} {points[0][1]}"
+    for px, py in points[1:]:
+        path_str += f" L {px} {py}"
+    path_str += " Z"
+    return pixie.parse_path(path_str)
+
+
+def legacy_star(cx, cy, outer_r, inner_r, sides):
+    points = []
+    for i in range(sides * 2):
+        angle = (math.pi / sides) * i - math.pi / 2
+        r = outer_r if i % 2 == 0 else inner_r
+        points.append((cx + r * math.cos(angle), cy + r * math.sin(angle)))
+    path_str = f"M {points[0][0]} {points[0][1]}"
+    for px, py in points[1:]:
+        path_str += f" L {px} {py}"
+    path_str += " Z"
+    return pixie.parse_path(path_str)
+
+
+def legacy_mandala_geometry(rings, layers, radius=160, cx=200, cy=200):
+    """Path construction portion of the old generate_mandala."""
+    for i in range(layers):
+        rotation = math.pi / (layers * 2) * i
+        legacy_polygon(cx, cy, radius * (0.95 - i * 0.15), 4 if i % 2 == 0 else 8, rotation)
+    centers = []
+    for i in range(rings):
+        angle = (2 * math.pi / rings) * i - math.pi / 2
+        centers.append((cx + radius * 0.55 * math.cos(angle), cy + radius * 0.55 * math.sin(angle)))
+    legacy_polygon(cx, cy, radius * 0.25, 3, -math.pi / 2)
+    return centers
+
+
+def mandala_geometry(rings, layers, radius=160, cx=200, cy=200):
+    """Path construction portion of generate_mandala using the geometry module."""
+    for i in range(layers):
+        rotation = math.pi / (layers * 2) * i
+        polygon_path(cx, cy, radius * (0.95 - i * 0.15), 4 if i % 2 == 0 else 8, rotation)
+    centers = regular_points(cx, cy, radius * 0.55, rings, TOP)
+    polygon_path(cx, cy, radius * 0.25, 3, TOP)
+    return centers
+
+
+def bench(fn, repeat: int, number: int) -> float:
+    """Best per-call time in microseconds."""
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number * 1e6
+
+
+def report(label: str, old_us: float, new_us: float):
+    print(f"{label:<28} {old_us:>12.1f} {new_us:>12.1f} {old_us / new_us:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark polygon/star/mandala path construction')
+    parser.add_argument('--sides', type=int, nargs='+', default=[5, 64, 512, 4096], help='Polygon/star side counts')
+    parser.add_argument('--rings', type=int, nargs='+', default=[8, 64, 512], help='Mandala ring counts')
+    parser.add_argument('--layers', type=int, default=12, help='Mandala polygon layers')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'case':<28} {'parse_path us':>12} {'geometry us':>12} {'speedup':>9}")
+    for sides in args.sides:
+        number = max(1, 20000 // sides)
+        old = bench(lambda: legacy_polygon(200, 200, 160, sides, TOP), args.repeat, number)
+        new = bench(lambda: polygon_path(200, 200, 160, sides, TOP), args.repeat, number)
+        report(f"polygon --sides {sides}", old, new)
+
+        old = bench(lambda: legacy_star(200, 200, 160, 64, sides), args.repeat, number)
+        new = bench(lambda: star_path(200, 200, 160, 64, sides, TOP), args.repeat, number)
+        report(f"star --sides {sides}", old, new)
+
+    for rings in args.rings:
+        number = max(1, 20000 // rings)
+        old = bench(lambda: legacy_mandala_geometry(rings, args.layers), args.repeat, number)
+        new = bench(lambda: mandala_geometry(rings, args.layers), args.repeat, number)
+        report(f"mandala --rings {rings}", old, new)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+NumPy Backend Check
+Pixel-diff the numpy backend against pixie and time both on large canvases.
+
+Exits non-zero if any case differs from pixie by more than the tolerance.
+The backend flattens and samples circles the way pixie does, so edges
+differ by a level or two of rounding; gradients by a few levels.
+
+Usage:
+    python scripts/benchmark_numpy_backend.py
+    python scripts/benchmark_numpy_backend.py --canvas 4000 --max-diff 4
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import pixie
+    import numpy as np
+except ImportError:
+    print("Error: pixie-python and numpy are required. Run: pip install pixie-python numpy")
+    sys.exit(1)
+
+from generate import GENERATORS, build_common_parser
+import numpy_backend
+
+# (command, extra options) rendered by both backends and compared pixel by pixel
+DIFF_CASES = [
+    ('shape', ['--style', 'circle']),
+    ('shape', ['--style', 'circle', '--fill']),
+    ('shape', ['--style', 'square']),
+    ('shape', ['--style', 'rectangle', '--fill']),
+    ('shape', ['--style', 'ring']),
+    ('shape', ['--style', 'ring', '--fill', '--bg', '#101010']),
+    ('shape', ['--style', 'circle', '--fill', '--gradient', 'linear', '--color2', '#3366FF']),
+    ('shape', ['--style', 'square', '--fill', '--gradient', 'radial', '--color2', '#FFFFFF', '--opacity', '0.8']),
+    ('pattern', ['--style', 'dots', '--size', '20', '--stroke', '2']),
+    ('pattern', ['--style', 'dots', '--size', '13', '--stroke', '1.5', '--width', '301', '--height', '211']),
+]
+
+
+def parse(command: str, options: list, output: str):
+    args = build_common_parser().parse_args(options + ['--output', output])
+    args.command = command
+    return args
+
+
+def load_premultiplied(path: str):
+    """Read a PNG through pixie as a premultiplied float array."""
+    image = pixie.read_image(path)
+    pixels = np.array([
+        [(c.r * c.a, c.g * c.a, c.b * c.a, c.a) for c in (image.get_color(x, y) for x in range(image.width))]
+        for y in range(image.height)
+    ])
+    return pixels
+
+
+def render(backend: str, command: str, options: list, output: str) -> float:
+    """Render with one backend, returning seconds taken."""
+    args = parse(command, options + ['--backend', backend], output)
+    start = time.perf_counter()
+    if backend == 'numpy':
+        image = numpy_backend.GENERATORS[command](args)
+        if image is None:
+            raise ValueError(f"numpy backend does not support {command} {options}")
+    else:
+        image = GENERATORS[command](args)
+    image.write_file(output)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the numpy backend with pixie')
+    parser.add_argument('--max-diff', type=float, default=8, help='Largest allowed per-pixel difference (0-255)')
+    parser.add_argument('--mean-diff', type=float, default=1, help='Largest allowed mean difference (0-255)')
+    parser.add_argument('--canvas', type=int, nargs='+', default=[2000, 4000], help='Canvas sizes for timing')
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        pixie_png = str(Path(tmp) / 'pixie.png')
+        numpy_png = str(Path(tmp) / 'numpy.png')
+
+        print(f"{'case':<62} {'max':>6} {'mean':>6}")
+        for command, options in DIFF_CASES:
+            render('pixie', command, options, pixie_png)
+            render('numpy', command, options, numpy_png)
+            diff = np.abs(load_premultiplied(pixie_png) - load_premultiplied(numpy_png)).max(axis=-1) * 255
+            ok = diff.max() <= args.max_diff and diff.mean() <= args.mean_diff
+            failed += not ok
+            label = f"{command} {' '.join(options)}"
+            print(f"{label:<62} {diff.max():>6.1f} {diff.mean():>6.2f}{'' if ok else '  FAIL'}")
+
+        print(f"\n{'timing':<40} {'pixie s':>9} {'numpy s':>9} {'speedup':>8}")
+        for canvas in args.canvas:
+            size = ['--width', str(canvas), '--height', str(canvas)]
+            for command, options in [
+                ('pattern', ['--style', 'dots', '--size', '10', '--stroke', '1.5'] + size),
+                ('shape', ['--style', 'circle', '--fill', '--gradient', 'radial', '--color2', '#FFFFFF',
+                           '--bg', '#101010', '--size', str(canvas)] + size),
+            ]:
+                old = render('pixie', command, options, pixie_png)
+                new = render('numpy', command, options, numpy_png)
+                label = f"{command} {options[1]} {canvas}x{canvas}"
+                print(f"{label:<40} {old:>9.3f} {new:>9.3f} {old / new:>7.1f}x")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
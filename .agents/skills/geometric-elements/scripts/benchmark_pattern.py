@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Pattern Benchmark
+Compare per-cell pattern drawing with the tile-stamping generate_pattern.
+
+Usage:
+    python scripts/benchmark_pattern.py
+    python scripts/benchmark_pattern.py --canvas 4000 --size 8 --styles dots
+"""
+
+import argparse
+import math
+import sys
+import time
+
+try:
+    import pixie
+except ImportError:
+    print("Error: pixie-python not installed. Run: pip install pixie-python")
+    sys.exit(1)
+
+from generate import create_solid_paint, stamp_pattern
+
+
+def legacy_pattern(width, height, cell_size, stroke, pattern_type, paint):
+    """The old generate_pattern loop: one native draw call (or two) per cell."""
+    image = pixie.Image(width, height)
+    ctx = image.new_context()
+    ctx.stroke_style = paint
+    ctx.line_width = stroke
+
+    for x in range(0, width, cell_size):
+        for y in range(0, height, cell_size):
+            cx = x + cell_size / 2
+            cy = y + cell_size / 2
+
+            if pattern_type == 'dots':
+                path = pixie.Path()
+                path.ellipse(cx, cy, stroke * 2, stroke * 2)
+                image.fill_path(path, paint)
+
+            elif pattern_type == 'crosses':
+                size = cell_size * 0.3
+                ctx.stroke_segment(cx - size, cy, cx + size, cy)
+                ctx.stroke_segment(cx, cy - size, cx, cy + size)
+
+            elif pattern_type == 'diamonds':
+                size = cell_size * 0.25
+                path_str = f"M {cx} {cy - size} L {cx + size} {cy} L {cx} {cy + size} L {cx - size} {cy} Z"
+                path = pixie.parse_path(path_str)
+                image.stroke_path(path, paint, pixie.Matrix3(), stroke)
+    return image
+
+
+def stamped_pattern(width, height, cell_size, stroke, pattern_type, paint):
+    """generate_pattern's tile-stamping path, minus writing the file."""
+    image = pixie.Image(width, height)
+    stamp_pattern(image, pattern_type, cell_size, stroke, paint)
+    return image
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-cell vs tile-stamped pattern rendering')
+    parser.add_argument('--canvas', type=int, nargs='+', default=[1000, 2000, 4000], help='Square canvas sizes')
+    parser.add_argument('--size', type=int, default=10, help='Cell size in pixels')
+    parser.add_argument('--stroke', type=float, default=1.5, help='Stroke width')
+    parser.add_argument('--styles', nargs='+', default=['dots', 'crosses', 'diamonds'], help='Pattern styles')
+    args = parser.parse_args()
+
+    paint = create_solid_paint('#D4A84B')
+    print(f"{'case':<30} {'cells':>8} {'per-cell s':>11} {'stamped s':>10} {'speedup':>8}")
+    for canvas in args.canvas:
+        cells = math.ceil(canvas / args.size) ** 2
+        for style in args.styles:
+            params = (canvas, canvas, args.size, args.stroke, style, paint)
+            old = timed(legacy_pattern, *params)
+            new = timed(stamped_pattern, *params)
+            print(f"{f'{style} {canvas}x{canvas}':<30} {cells:>8} {old:>11.3f} {new:>10.3f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
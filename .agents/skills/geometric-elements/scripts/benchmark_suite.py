@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Time every generator and shape style across a matrix of options, with
+geometry construction, rasterization and encoding measured separately.
+
+Geometry is timed with generate.build_geometry, which runs the generator
+against a recording canvas (see multiscale.py) that builds every path but
+draws nothing. The 1x render is timed the way generate.py draws it, with
+run_generator on a real pixie.Image; rasterization is the render time
+less the geometry time. Encoding is timed by encoding that image in each
+--formats entry. Results are written as JSON; pass an earlier results file
+as --baseline to list cases that got slower (exit code 1 on regressions).
+
+Usage:
+    python scripts/benchmark_suite.py --output bench.json
+    python scripts/benchmark_suite.py --baseline bench.json --output bench-new.json
+    python scripts/benchmark_suite.py --filter mandala --canvas 400 1600 --rings 8 64 128
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+from generate import FORMATS, GENERATORS, build_common_parser, build_geometry, encode_image, run_generator
+from render_cache import pixie_version
+
+SHAPE_STYLES = ('circle', 'ellipse', 'rectangle', 'square', 'rounded-rect', 'triangle', 'polygon', 'star',
+                'diamond', 'ring', 'cross', 'arrow-right', 'arrow-up', 'heart', 'hexagon', 'octagon', 'crescent')
+SIDED_STYLES = ('polygon', 'star')
+STYLES = {
+    'line-divider': (None, 'dotted'),
+    'arc-accent': (None, 'double'),
+    'pattern': ('dots', 'crosses', 'diamonds'),
+    'shape': SHAPE_STYLES,
+}
+# Commands whose canvas is --width/--height; the others grow with --size
+CANVAS_COMMANDS = ('line-divider', 'frame-border', 'pattern')
+GRADIENT_COLOR = '#1F3A5F'
+PATTERN_CELL = 20
+
+STAGES = ('geometry_ms', 'render_ms', 'raster_ms')
+
+
+def build_cases(args) -> list:
+    """(command, argv) for every combination of the matrix options."""
+    cases = []
+    for command in GENERATORS:
+        for style in STYLES.get(command, (None,)):
+            for canvas in args.canvas:
+                for stroke in args.stroke:
+                    for gradient in args.gradients:
+                        argv = ['--style', style] if style else []
+                        if command == 'line-divider':
+                            argv += ['--width', str(canvas)]
+                        elif command == 'pattern':
+                            argv += ['--width', str(canvas), '--height', str(canvas), '--size', str(PATTERN_CELL)]
+                        elif command in CANVAS_COMMANDS:
+                            argv += ['--width', str(canvas), '--height', str(canvas)]
+                        else:
+                            argv += ['--size', str(canvas)]
+                        argv += ['--stroke', f"{stroke:g}"]
+                        if gradient != 'none':
+                            argv += ['--gradient', gradient, '--color2', GRADIENT_COLOR]
+
+                        if command == 'mandala':
+                            variants = [['--rings', str(rings), '--layers', str(layers)]
+                                        for rings in args.rings for layers in args.layers]
+                        elif style in SIDED_STYLES:
+                            variants = [['--sides', str(sides)] for sides in args.sides]
+                        else:
+                            variants = [[]]
+                        cases.extend((command, argv + variant) for variant in variants)
+    if args.filter:
+        cases = [case for case in cases if all(term in case_name(*case) for term in args.filter)]
+    return cases
+
+
+def case_name(command: str, argv: list) -> str:
+    return ' '.join([command] + argv)
+
+
+def best_ms(times: list) -> float:
+    return round(min(times) * 1000, 3)
+
+
+def measure(command: str, argv: list, formats: list, repeat: int) -> dict:
+    """Best-of-`repeat` stage timings for one case, plus the encoded size per format."""
+    args = build_common_parser().parse_args(argv)
+    args.command = command
+    args.format = 'png'
+    times = {'geometry_ms': [], 'render_ms': []}
+    encode_times = {fmt: [] for fmt in formats}
+    sizes = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build_geometry(command, args)
+        times['geometry_ms'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        image = run_generator(command, args)
+        times['render_ms'].append(time.perf_counter() - start)
+        for fmt in formats:
+            encode_args = argparse.Namespace(**{**vars(args), 'format': fmt})
+            start = time.perf_counter()
+            sizes[fmt] = len(encode_image(image, encode_args))
+            encode_times[fmt].append(time.perf_counter() - start)
+
+    result = {'case': case_name(command, argv), 'command': command, 'argv': argv,
+              'width': image.width, 'height': image.height}
+    result.update({stage: best_ms(times[stage]) for stage in ('geometry_ms', 'render_ms')})
+    result['raster_ms'] = round(max(result['render_ms'] - result['geometry_ms'], 0), 3)
+    result['encode_ms'] = {fmt: best_ms(values) for fmt, values in encode_times.items()}
+    result['bytes'] = sizes
+    result['total_ms'] = round(result['render_ms'] + sum(result['encode_ms'].values()), 3)
+    return result
+
+
+def stage_times(result: dict) -> dict:
+    """Flat {stage: ms} for one case, e.g. {'geometry_ms': .., 'encode_ms.png': ..}."""
+    times = {stage: result[stage] for stage in STAGES}
+    times.update({f"encode_ms.{fmt}": ms for fmt, ms in result['encode_ms'].items()})
+    return times
+
+
+def compare(results: list, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """(case, stage, baseline ms, new ms) for every stage slower than the baseline by both margins."""
+    previous = {case['case']: case for case in baseline['cases']}
+    regressions = []
+    for result in results:
+        if result['case'] not in previous:
+            continue
+        old_times = stage_times(previous[result['case']])
+        for stage, new in stage_times(result).items():
+            old = old_times.get(stage)
+            if old is not None and new > old * (1 + threshold) and new - old > min_delta_ms:
+                regressions.append((result['case'], stage, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every generator across an option matrix')
+    parser.add_argument('--canvas', type=int, nargs='+', default=[200, 800],
+                        help='Element --size, or --width/--height for canvas-sized commands')
+    parser.add_argument('--stroke', type=float, nargs='+', default=[2, 8], help='Stroke widths')
+    parser.add_argument('--sides', type=int, nargs='+', default=[5, 12], help='Sides for polygon/star')
+    parser.add_argument('--rings', type=int, nargs='+', default=[8, 64], help='Mandala ring counts')
+    parser.add_argument('--layers', type=int, nargs='+', default=[3, 12], help='Mandala polygon layers')
+    parser.add_argument('--gradients', nargs='+', choices=['none', 'linear', 'radial'],
+                        default=['none', 'linear', 'radial'], help='Gradient types')
+    parser.add_argument('--formats', nargs='+', choices=[fmt for fmt in FORMATS if fmt != 'svg'], default=['png'],
+                        help='Formats timed in the encode stage (png8/webp need Pillow)')
+    parser.add_argument('--filter', nargs='+', help='Only cases whose name contains all of these, e.g. mandala "--rings 64"')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is reported)')
+    parser.add_argument('--output', '-o', help='Write results as JSON')
+    parser.add_argument('--baseline', help='Earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown counted as a regression (default: 0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='Ignore slowdowns smaller than this many ms (timer noise on tiny cases)')
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    cases = build_cases(args)
+    if not cases:
+        print("Error: no cases match --filter")
+        sys.exit(1)
+
+    encode_columns = ' '.join(f"{fmt + ' ms':>10}" for fmt in args.formats)
+    print(f"{'case':<84} {'geometry ms':>11} {'raster ms':>10} {'render ms':>10} {encode_columns}")
+    results = []
+    for command, argv in cases:
+        result = measure(command, argv, args.formats, args.repeat)
+        results.append(result)
+        encoded = ' '.join(f"{result['encode_ms'][fmt]:>10.2f}" for fmt in args.formats)
+        print(f"{result['case']:<84} {result['geometry_ms']:>11.2f} {result['raster_ms']:>10.2f} "
+              f"{result['render_ms']:>10.2f} {encoded}")
+
+    totals = {stage: sum(stage_times(result)[stage] for result in results) for stage in stage_times(results[0])}
+    print(f"\n{len(results)} cases; total " + ', '.join(f"{stage} {ms:.1f}" for stage, ms in totals.items()))
+
+    if args.output:
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'pixie': pixie_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'formats': args.formats,
+            'cases': results,
+        }
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results: {args.output}")
+
+    if baseline is None:
+        return
+    if baseline.get('pixie') != pixie_version():
+        print(f"Note: baseline was recorded with pixie {baseline.get('pixie')}, now {pixie_version()}")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    matched = sum(1 for result in results if result['case'] in {case['case'] for case in baseline['cases']})
+    print(f"\nCompared {matched} cases with {args.baseline}: {len(regressions)} regressions "
+          f"(> {args.threshold:.0%} and > {args.min_delta_ms:g} ms slower)")
+    for case, stage, old, new in regressions:
+        print(f"  {case:<84} {stage:<16} {old:>9.2f} -> {new:>9.2f} ms ({new / old - 1:+.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Image Encoders
+Compressed and palette-quantized output for generate.py --format/--encode.
+
+pixie-python only writes default PNG, so the other encodings go through
+Pillow: the rendered pixels are pulled out of pixie as an uncompressed BMP
+(numpy canvases hand theirs over directly) and re-encoded as
+
+- png8: palette PNG. Single-colour accents and dividers hold far fewer
+  than 256 distinct RGBA values (one colour at many antialiasing alphas),
+  so they get an exact palette; busier images are octree-quantized.
+- webp: lossless WebP, or lossy with --quality.
+
+--encode picks the encoder effort: fast, balanced or small.
+
+Pillow and numpy are imported on first use, so the default pixie PNG path
+never pays for loading them.
+"""
+
+import io
+import os
+import tempfile
+
+# Pillow's Image module, set by require_pillow()
+PILImage = None
+
+PRESETS = ('fast', 'balanced', 'small')
+DEFAULT_PRESET = 'balanced'
+
+# Pillow save options per --encode preset
+PNG_OPTIONS = {
+    'fast': {'compress_level': 1},
+    'balanced': {'compress_level': 6},
+    'small': {'optimize': True},
+}
+# For lossless WebP, quality is compression effort rather than fidelity
+WEBP_LOSSLESS_OPTIONS = {
+    'fast': {'method': 0, 'quality': 0},
+    'balanced': {'method': 4, 'quality': 75},
+    'small': {'method': 6, 'quality': 100},
+}
+WEBP_LOSSY_METHODS = {'fast': 0, 'balanced': 4, 'small': 6}
+
+
+def require_pillow():
+    global PILImage
+    if PILImage is None:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError("Pillow not installed. Run: pip install pillow") from None
+        PILImage = Image
+
+
+def to_pillow(image):
+    """RGBA Pillow image holding a rendered element's pixels."""
+    require_pillow()
+    if hasattr(image, 'to_rgba8'):
+        return PILImage.fromarray(image.to_rgba8(), 'RGBA')
+    # pixie writes BMP without compressing, the cheapest way to get raw pixels out
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        path = os.path.join(tmp, 'element.bmp')
+        image.write_file(path)
+        with PILImage.open(path) as bmp:
+            return bmp.convert('RGBA')
+
+
+def exact_palette(rgba: bytes, colors: list) -> tuple:
+    """(palette, indices) mapping every pixel to its own colour, for at most 256 colours."""
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        pixels = np.frombuffer(rgba, dtype=np.uint32)
+        palette, indices = np.unique(pixels, return_inverse=True)
+        return palette.tobytes(), indices.astype(np.uint8).tobytes()
+    palette = [bytes(color) for _, color in colors]
+    lookup = {color: i for i, color in enumerate(palette)}
+    return b''.join(palette), bytes(lookup[rgba[i:i + 4]] for i in range(0, len(rgba), 4))
+
+
+def quantize(image):
+    """Palette ('P' mode) version of an RGBA Pillow image, exact when it has at most 256 colours."""
+    colors = image.getcolors(256)
+    if colors is None:
+        return image.quantize(256, method=PILImage.Quantize.FASTOCTREE)
+    palette, indices = exact_palette(image.tobytes(), colors)
+    quantized = PILImage.frombytes('P', image.size, indices)
+    quantized.putpalette(palette, rawmode='RGBA')
+    return quantized
+
+
+def encode(image, fmt: str, preset: str = None, quality: int = None) -> bytes:
+    """Encode a rendered image as png, png8 or webp bytes with the given effort preset."""
+    preset = preset or DEFAULT_PRESET
+    require_pillow()
+    pixels = to_pillow(image)
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        if quality is None:
+            pixels.save(buffer, 'WEBP', lossless=True, **WEBP_LOSSLESS_OPTIONS[preset])
+        else:
+            pixels.save(buffer, 'WEBP', quality=quality, method=WEBP_LOSSY_METHODS[preset])
+    elif fmt == 'png8':
+        quantize(pixels).save(buffer, 'PNG', **PNG_OPTIONS[preset])
+    else:
+        pixels.save(buffer, 'PNG', **PNG_OPTIONS[preset])
+    return buffer.getvalue()
@@ -1,21 +1,47 @@
 #!/usr/bin/env python3
 """
 Geometric Elements Generator
-Generate decorative geometric elements using Pixie-python.
+Generate decorative geometric elements using Pixie-python, as PNG, WebP or SVG.
 """
 
 import argparse
+import cProfile
+import importlib.util
+import json
 import math
+import os
 import sys
+import tempfile
+import time
+from functools import lru_cache
 from pathlib import Path
 
+from render_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, RenderCache
+
 try:
     import pixie
 except ImportError:
     print("Error: pixie-python not installed. Run: pip install pixie-python")
     sys.exit(1)
 
+import encoders
+import profiling
+from geometry import TOP, polygon_path, polyline_path, regular_points, star_path
+from multiscale import ScaledImage, parse_scales, scale_label, scaled_output
+from svg_output import SvgImage, SvgPath
+
+# Paints are native objects; batch runs reuse the same brand colours and
+# gradients constantly, so identical requests share one Paint. Callers must
+# treat returned paints and colours as read-only.
+PAINT_CACHE_SIZE = 256
+COLOR_CACHE_SIZE = 1024
+
+FORMATS = ('png', 'png8', 'webp', 'svg')
+FORMAT_SUFFIXES = {'png': '.png', 'png8': '.png', 'webp': '.webp', 'svg': '.svg'}
+CONTENT_TYPES = {'png': 'image/png', 'png8': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+
 
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
 def hex_to_color(hex_str: str, opacity: float = 1.0) -> pixie.Color:
     """Convert hex color to pixie Color."""
     hex_str = hex_str.lstrip('#')
@@ -25,6 +51,8 @@ def hex_to_color(hex_str: str, opacity: float = 1.0) -> pixie.Color:
     return pixie.Color(r, g, b, opacity)
 
 
+@profiling.profiled('paint')
+@lru_cache(maxsize=PAINT_CACHE_SIZE)
 def create_linear_gradient(color1: str, color2: str, x1: float, y1: float, x2: float, y2: float, opacity: float = 1.0) -> pixie.Paint:
     """Create linear gradient paint."""
     paint = pixie.Paint(pixie.LINEAR_GRADIENT_PAINT)
@@ -35,6 +63,8 @@ def create_linear_gradient(color1: str, color2: str, x1: float, y1: float, x2: f
     return paint
 
 
+@profiling.profiled('paint')
+@lru_cache(maxsize=PAINT_CACHE_SIZE)
 def create_radial_gradient(color1: str, color2: str, cx: float, cy: float, radius: float, opacity: float = 1.0) -> pixie.Paint:
     """Create radial gradient paint."""
     paint = pixie.Paint(pixie.RADIAL_GRADIENT_PAINT)
@@ -46,6 +76,8 @@ def create_radial_gradient(color1: str, color2: str, cx: float, cy: float, radiu
     return paint
 
 
+@profiling.profiled('paint')
+@lru_cache(maxsize=PAINT_CACHE_SIZE)
 def create_solid_paint(color: str, opacity: float = 1.0) -> pixie.Paint:
     """Create solid color paint."""
     paint = pixie.Paint(pixie.SOLID_PAINT)
@@ -53,6 +85,28 @@ def create_solid_paint(color: str, opacity: float = 1.0) -> pixie.Paint:
     return paint
 
 
+def new_image(args, width: int, height: int):
+    """
+    Canvas for a generator. With --scales other than plain 1x (or inside
+    build_geometry) this records the drawing calls so they can be
+    rasterized at each scale; with --format svg it records them for the
+    SVG writer instead. While profiling, the canvas is wrapped to time
+    each drawing call.
+    """
+    if args.format == 'svg':
+        return profiling.wrap(SvgImage(width, height))
+    if args.scales in (None, (1.0,)) and not _recording:
+        return profiling.wrap(pixie.Image(width, height))
+    return profiling.wrap(ScaledImage(width, height))
+
+
+def new_path(image, data: str = None):
+    """Empty path, or one parsed from SVG path data, of the kind `image` draws."""
+    if isinstance(profiling.unwrap(image), SvgImage):
+        return SvgPath(data)
+    return pixie.parse_path(data) if data is not None else pixie.Path()
+
+
 def generate_corner_accent(args):
     """Generate L-shaped corner accent."""
     size = args.size
@@ -63,7 +117,7 @@ def generate_corner_accent(args):
     width = int(args.width or size + padding * 2)
     height = int(args.height or size + padding * 2)
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     # Create paint
     if args.gradient == 'linear' and args.color2:
@@ -100,8 +154,7 @@ def generate_corner_accent(args):
         padding + accent_offset + size * 0.2, padding + stroke * 1.5
     )
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
 
 
 def generate_line_divider(args):
@@ -110,7 +163,7 @@ def generate_line_divider(args):
     height = int(args.height or 50)
     stroke = args.stroke
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     y_center = height / 2
     padding = 20
@@ -131,19 +184,19 @@ def generate_line_divider(args):
 
     # Optional: decorative dots at ends
     if args.style == 'dotted':
+        # Same cached paint as the main line when it isn't a gradient
         dot_paint = create_solid_paint(args.color, args.opacity)
 
         # Draw dots as small circles
-        dot_path = pixie.Path()
+        dot_path = new_path(image)
         dot_path.ellipse(padding, y_center, stroke * 1.5, stroke * 1.5)
         image.fill_path(dot_path, dot_paint)
 
-        dot_path2 = pixie.Path()
+        dot_path2 = new_path(image)
         dot_path2.ellipse(width - padding, y_center, stroke * 1.5, stroke * 1.5)
         image.fill_path(dot_path2, dot_paint)
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
 
 
 def generate_arc_accent(args):
@@ -154,7 +207,7 @@ def generate_arc_accent(args):
     width = int(args.width or size + padding * 2)
     height = int(args.height or size + padding * 2)
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     cx = width / 2
     cy = height / 2
@@ -176,7 +229,7 @@ def generate_arc_accent(args):
     end_y = cy
 
     path_str = f"M {start_x} {start_y} A {radius} {radius} 0 0 1 {end_x} {end_y}"
-    path = pixie.parse_path(path_str)
+    path = new_path(image, path_str)
     image.stroke_path(path, paint, pixie.Matrix3(), args.stroke)
 
     # Second arc (inner) if double style
@@ -188,11 +241,10 @@ def generate_arc_accent(args):
         inner_end_y = cy
 
         inner_path_str = f"M {inner_start_x} {inner_start_y} A {inner_radius} {inner_radius} 0 0 1 {inner_end_x} {inner_end_y}"
-        inner_path = pixie.parse_path(inner_path_str)
+        inner_path = new_path(image, inner_path_str)
         image.stroke_path(inner_path, paint, pixie.Matrix3(), args.stroke * 0.6)
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
 
 
 def generate_frame_border(args):
@@ -203,7 +255,7 @@ def generate_frame_border(args):
     padding = int(stroke * 2)
     corner_size = args.size or 40
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     paint = create_solid_paint(args.color, args.opacity)
 
@@ -229,8 +281,7 @@ def generate_frame_border(args):
     ctx.stroke_segment(padding + corner_size, height - padding, padding, height - padding)
     ctx.stroke_segment(padding, height - padding, padding, height - padding - corner_size)
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
 
 
 def generate_shape(args):
@@ -241,12 +292,12 @@ def generate_shape(args):
     width = int(args.width or size + padding * 2)
     height = int(args.height or size + padding * 2)
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     # Fill background if specified
     if args.bg:
         bg_paint = create_solid_paint(args.bg, 1.0)
-        bg_path = pixie.Path()
+        bg_path = new_path(image)
         bg_path.rect(0, 0, width, height)
         image.fill_path(bg_path, bg_paint)
 
@@ -267,7 +318,7 @@ def generate_shape(args):
     # Get number of sides for polygons
     sides = args.sides if hasattr(args, 'sides') and args.sides else 5
 
-    path = pixie.Path()
+    path = new_path(image)
 
     if shape_type == 'circle':
         path.ellipse(cx, cy, radius, radius)
@@ -298,46 +349,17 @@ def generate_shape(args):
         path.rounded_rect(x, y, w, h, r, r, r, r)
 
     elif shape_type == 'triangle':
-        points = []
-        for i in range(3):
-            angle = (2 * math.pi / 3) * i - math.pi / 2
-            px = cx + radius * math.cos(angle)
-            py = cy + radius * math.sin(angle)
-            points.append((px, py))
-        path = pixie.parse_path(f"M {points[0][0]} {points[0][1]} L {points[1][0]} {points[1][1]} L {points[2][0]} {points[2][1]} Z")
+        path = polygon_path(cx, cy, radius, 3, TOP, path=path)
 
     elif shape_type == 'polygon':
-        points = []
-        for i in range(sides):
-            angle = (2 * math.pi / sides) * i - math.pi / 2
-            px = cx + radius * math.cos(angle)
-            py = cy + radius * math.sin(angle)
-            points.append((px, py))
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = polygon_path(cx, cy, radius, sides, TOP, path=path)
 
     elif shape_type == 'star':
-        points = []
-        outer_r = radius
-        inner_r = radius * 0.4
-        for i in range(sides * 2):
-            angle = (math.pi / sides) * i - math.pi / 2
-            r = outer_r if i % 2 == 0 else inner_r
-            px = cx + r * math.cos(angle)
-            py = cy + r * math.sin(angle)
-            points.append((px, py))
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = star_path(cx, cy, radius, radius * 0.4, sides, TOP, path=path)
 
     elif shape_type == 'diamond' or shape_type == 'rhombus':
         points = [(cx, cy - radius), (cx + radius * 0.7, cy), (cx, cy + radius), (cx - radius * 0.7, cy)]
-        path = pixie.parse_path(f"M {points[0][0]} {points[0][1]} L {points[1][0]} {points[1][1]} L {points[2][0]} {points[2][1]} L {points[3][0]} {points[3][1]} Z")
+        path = polyline_path(points, path=path)
 
     elif shape_type == 'ring' or shape_type == 'donut':
         # Outer circle
@@ -368,11 +390,7 @@ def generate_shape(args):
             (cx - radius + shaft_w, cy + shaft_h/2),  # shaft bottom-right
             (cx - radius, cy + shaft_h/2),  # shaft bottom-left
         ]
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = polyline_path(points, path=path)
 
     elif shape_type == 'arrow-up':
         shaft_w = radius * 0.4
@@ -385,11 +403,7 @@ def generate_shape(args):
             (cx - shaft_w/2, cy - radius + radius * 0.6),  # inner left
             (cx - radius * 0.5, cy - radius + radius * 0.6),  # head left
         ]
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = polyline_path(points, path=path)
 
     elif shape_type == 'heart':
         # Heart shape using bezier curves
@@ -403,35 +417,13 @@ def generate_shape(args):
             C {cx + 50*scale} {cy + 10*scale} {cx + 10*scale} {cy + 30*scale} {cx} {cy + 40*scale}
             Z
         """
-        path = pixie.parse_path(path_str)
+        path = new_path(image, path_str)
 
     elif shape_type == 'hexagon':
-        sides = 6
-        points = []
-        for i in range(sides):
-            angle = (2 * math.pi / sides) * i - math.pi / 2
-            px = cx + radius * math.cos(angle)
-            py = cy + radius * math.sin(angle)
-            points.append((px, py))
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = polygon_path(cx, cy, radius, 6, TOP, path=path)
 
     elif shape_type == 'octagon':
-        sides = 8
-        points = []
-        for i in range(sides):
-            angle = (2 * math.pi / sides) * i - math.pi / 2 + math.pi / 8
-            px = cx + radius * math.cos(angle)
-            py = cy + radius * math.sin(angle)
-            points.append((px, py))
-        path_str = f"M {points[0][0]} {points[0][1]}"
-        for px, py in points[1:]:
-            path_str += f" L {px} {py}"
-        path_str += " Z"
-        path = pixie.parse_path(path_str)
+        path = polygon_path(cx, cy, radius, 8, TOP + math.pi / 8, path=path)
 
     elif shape_type == 'crescent' or shape_type == 'moon':
         # Crescent moon
@@ -440,11 +432,12 @@ def generate_shape(args):
         path.ellipse(cx + radius * 0.4, cy, radius * 0.8, radius * 0.9)
 
     else:
-        print(f"Unknown shape: {shape_type}")
-        print("Available: circle, ellipse, rectangle, square, rounded-rect, triangle,")
-        print("           polygon, star, diamond, ring, cross, arrow, arrow-up, heart,")
-        print("           hexagon, octagon, crescent")
-        return
+        raise ValueError(
+            f"Unknown shape: {shape_type}\n"
+            "Available: circle, ellipse, rectangle, square, rounded-rect, triangle,\n"
+            "           polygon, star, diamond, ring, cross, arrow, arrow-up, heart,\n"
+            "           hexagon, octagon, crescent"
+        )
 
     # Draw shape
     if fill_mode:
@@ -452,8 +445,7 @@ def generate_shape(args):
     else:
         image.stroke_path(path, paint, pixie.Matrix3(), args.stroke)
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
 
 
 def generate_mandala(args):
@@ -464,12 +456,12 @@ def generate_mandala(args):
     width = int(args.width or size + padding * 2)
     height = int(args.height or size + padding * 2)
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     # Fill background if specified
     if args.bg:
         bg_paint = create_solid_paint(args.bg, 1.0)
-        bg_path = pixie.Path()
+        bg_path = new_path(image)
         bg_path.rect(0, 0, width, height)
         image.fill_path(bg_path, bg_paint)
 
@@ -493,35 +485,18 @@ def generate_mandala(args):
         rotation = math.pi / (n_polygons * 2) * i  # Offset each layer
         sides = 4 if i % 2 == 0 else 8  # Alternate between square and octagon
 
-        points = []
-        for j in range(sides):
-            angle = (2 * math.pi / sides) * j + rotation
-            px = cx + poly_radius * math.cos(angle)
-            py = cy + poly_radius * math.sin(angle)
-            points.append((px, py))
-
         # Draw polygon
-        path_parts = [f"M {points[0][0]} {points[0][1]}"]
-        for px, py in points[1:]:
-            path_parts.append(f"L {px} {py}")
-        path_parts.append("Z")
-        path_str = " ".join(path_parts)
-        path = pixie.parse_path(path_str)
+        path = polygon_path(cx, cy, poly_radius, sides, rotation, path=new_path(image))
         image.stroke_path(path, paint, pixie.Matrix3(), args.stroke)
 
     # 2. Draw circles arranged in a ring
     circle_radius = radius * 0.18
     ring_radius = radius * 0.55
 
-    circle_centers = []
-    for i in range(n_circles):
-        angle = (2 * math.pi / n_circles) * i - math.pi / 2
-        circle_cx = cx + ring_radius * math.cos(angle)
-        circle_cy = cy + ring_radius * math.sin(angle)
-        circle_centers.append((circle_cx, circle_cy))
-
+    circle_centers = regular_points(cx, cy, ring_radius, n_circles, TOP)
+    for circle_cx, circle_cy in circle_centers:
         # Draw circle
-        circle_path = pixie.Path()
+        circle_path = new_path(image)
         circle_path.ellipse(circle_cx, circle_cy, circle_radius, circle_radius)
         image.stroke_path(circle_path, paint, pixie.Matrix3(), args.stroke)
 
@@ -547,29 +522,71 @@ def generate_mandala(args):
 
     # 4. Draw central triangle
     triangle_radius = radius * 0.25
-    triangle_points = []
-    for i in range(3):
-        angle = (2 * math.pi / 3) * i - math.pi / 2
-        px = cx + triangle_radius * math.cos(angle)
-        py = cy + triangle_radius * math.sin(angle)
-        triangle_points.append((px, py))
-
-    tri_path_str = f"M {triangle_points[0][0]} {triangle_points[0][1]} L {triangle_points[1][0]} {triangle_points[1][1]} L {triangle_points[2][0]} {triangle_points[2][1]} Z"
-    tri_path = pixie.parse_path(tri_path_str)
+    tri_path = polygon_path(cx, cy, triangle_radius, 3, TOP, path=new_path(image))
     image.stroke_path(tri_path, paint, pixie.Matrix3(), args.stroke)
 
     # 5. Draw center circle
-    center_circle = pixie.Path()
+    center_circle = new_path(image)
     center_circle.ellipse(cx, cy, radius * 0.08, radius * 0.08)
     image.stroke_path(center_circle, paint, pixie.Matrix3(), args.stroke)
 
     # 6. Draw outer circle
-    outer_circle = pixie.Path()
+    outer_circle = new_path(image)
     outer_circle.ellipse(cx, cy, radius, radius)
     image.stroke_path(outer_circle, paint, pixie.Matrix3(), args.stroke * 0.7)
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
+    return image
+
+
+def draw_pattern_cell(image, pattern_type: str, cx: float, cy: float, cell_size: int, stroke: float, paint):
+    """Draw one pattern motif centred on (cx, cy)."""
+    if pattern_type == 'dots':
+        path = new_path(image)
+        path.ellipse(cx, cy, stroke * 2, stroke * 2)
+        image.fill_path(path, paint)
+
+    elif pattern_type == 'crosses':
+        ctx = image.new_context()
+        ctx.stroke_style = paint
+        ctx.line_width = stroke
+        size = cell_size * 0.3
+        ctx.stroke_segment(cx - size, cy, cx + size, cy)
+        ctx.stroke_segment(cx, cy - size, cx, cy + size)
+
+    elif pattern_type == 'diamonds':
+        size = cell_size * 0.25
+        path = polyline_path([(cx, cy - size), (cx + size, cy), (cx, cy + size), (cx - size, cy)], path=new_path(image))
+        image.stroke_path(path, paint, pixie.Matrix3(), stroke)
+
+
+def pattern_reach(pattern_type: str, cell_size: int, stroke: float) -> float:
+    """How far a motif's pixels can extend from the cell centre."""
+    if pattern_type == 'dots':
+        return stroke * 2
+    if pattern_type == 'crosses':
+        return cell_size * 0.3 + stroke / 2
+    if pattern_type == 'diamonds':
+        # Miter joins at the diamond's points stick out past half the stroke
+        return cell_size * 0.25 + stroke
+    return 0
+
+
+def stamp_pattern(image, pattern_type: str, cell_size: int, stroke: float, paint):
+    """Tile one motif per cell across the whole image."""
+    width, height = image.width, image.height
+
+    # Render the motif once into a tile, padded if it spills into neighbouring cells
+    margin = max(0, math.ceil(pattern_reach(pattern_type, cell_size, stroke) + 1 - cell_size / 2))
+    canvas = type(profiling.unwrap(image))
+    tile = profiling.wrap(canvas(cell_size + margin * 2, cell_size + margin * 2))
+    draw_pattern_cell(tile, pattern_type, margin + cell_size / 2, margin + cell_size / 2, cell_size, stroke, paint)
+
+    # Stamp the tile across one row, then stamp that row down the canvas
+    row = profiling.wrap(canvas(width + margin * 2, tile.height))
+    for x in range(0, width, cell_size):
+        row.draw(tile, pixie.translate(x, 0))
+    for y in range(0, height, cell_size):
+        image.draw(row, pixie.translate(-margin, y - margin))
 
 
 def generate_pattern(args):
@@ -578,46 +595,44 @@ def generate_pattern(args):
     height = int(args.height or 400)
     cell_size = args.size or 50
 
-    image = pixie.Image(width, height)
+    image = new_image(args, width, height)
 
     paint = create_solid_paint(args.color, args.opacity)
 
-    ctx = image.new_context()
-    ctx.stroke_style = paint
-    ctx.line_width = args.stroke
-
     pattern_type = args.style or 'dots'
 
-    for x in range(0, width, cell_size):
-        for y in range(0, height, cell_size):
-            cx = x + cell_size / 2
-            cy = y + cell_size / 2
+    stamp_pattern(image, pattern_type, cell_size, args.stroke, paint)
 
-            if pattern_type == 'dots':
-                path = pixie.Path()
-                path.ellipse(cx, cy, args.stroke * 2, args.stroke * 2)
-                image.fill_path(path, paint)
+    return image
 
-            elif pattern_type == 'crosses':
-                size = cell_size * 0.3
-                ctx.stroke_segment(cx - size, cy, cx + size, cy)
-                ctx.stroke_segment(cx, cy - size, cx, cy + size)
 
-            elif pattern_type == 'diamonds':
-                size = cell_size * 0.25
-                path_str = f"M {cx} {cy - size} L {cx + size} {cy} L {cx} {cy + size} L {cx - size} {cy} Z"
-                path = pixie.parse_path(path_str)
-                image.stroke_path(path, paint, pixie.Matrix3(), args.stroke)
+GENERATORS = {
+    'corner-accent': generate_corner_accent,
+    'line-divider': generate_line_divider,
+    'arc-accent': generate_arc_accent,
+    'frame-border': generate_frame_border,
+    'pattern': generate_pattern,
+    'mandala': generate_mandala,
+    'shape': generate_shape,
+}
 
-    image.write_file(args.output)
-    print(f"Generated: {args.output}")
 
+class JobArgumentParser(argparse.ArgumentParser):
+    """Argument parser that raises instead of exiting, for manifest jobs."""
 
-def main():
-    parser = argparse.ArgumentParser(description='Generate geometric decorative elements')
-    subparsers = parser.add_subparsers(dest='command', help='Element type')
+    def error(self, message):
+        raise ValueError(message)
 
-    # Common arguments for all commands
+
+def scales_option(text: str) -> tuple:
+    try:
+        return parse_scales(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated positive numbers, got {text!r}")
+
+
+def build_common_parser() -> argparse.ArgumentParser:
+    """Options shared by every element command (and every batch job)."""
     common = argparse.ArgumentParser(add_help=False)
     common.add_argument('--color', default='#D4A84B', help='Primary color (hex)')
     common.add_argument('--color2', help='Secondary color for gradient')
@@ -625,7 +640,14 @@ def main():
     common.add_argument('--width', type=int, help='Canvas width')
     common.add_argument('--height', type=int, help='Canvas height')
     common.add_argument('--stroke', type=float, default=4, help='Stroke width')
-    common.add_argument('--output', '-o', default='output.png', help='Output file path')
+    common.add_argument('--output', '-o', default='output.png', help="Output file path ('-' for stdout)")
+    common.add_argument('--format', choices=FORMATS,
+                        help="Output format (default: from the --output suffix, else png); png8 is a palette PNG, "
+                             "svg writes vector paths and gradients without rasterizing")
+    common.add_argument('--encode', choices=encoders.PRESETS,
+                        help="Encoder effort for png/png8/webp (needs Pillow; default: pixie's PNG writer, "
+                             "balanced for png8/webp)")
+    common.add_argument('--quality', type=int, help='Lossy WebP quality 1-100 (default: lossless)')
     common.add_argument('--gradient', choices=['linear', 'radial'], help='Gradient type')
     common.add_argument('--opacity', type=float, default=1.0, help='Opacity 0.0-1.0')
     common.add_argument('--style', help='Style variant')
@@ -634,15 +656,463 @@ def main():
     common.add_argument('--layers', type=int, default=3, help='Number of polygon layers (mandala)')
     common.add_argument('--fill', action='store_true', help='Fill shape instead of stroke')
     common.add_argument('--sides', type=int, default=5, help='Number of sides (polygon/star)')
+    common.add_argument('--backend', choices=['pixie', 'numpy'], default='pixie',
+                        help='Rasterizer (numpy: experimental, slower than pixie; circles/rects/rings/dot grids, needs numpy)')
+    common.add_argument('--scales', type=scales_option,
+                        help="Render at several scales, e.g. 1,2,3 (writes name.png, name@2x.png, name@3x.png)")
+    return common
+
+
+def build_profile_parser() -> argparse.ArgumentParser:
+    """Options for profiling a single element render."""
+    profile_opts = argparse.ArgumentParser(add_help=False)
+    profile_opts.add_argument('--profile', action='store_true',
+                              help='Print wall/CPU time and allocations per render stage (bypasses the cache)')
+    profile_opts.add_argument('--profile-output',
+                              help='Also write the profile: .prof for cProfile (pstats/snakeviz), '
+                                   'anything else as speedscope JSON')
+    return profile_opts
+
+
+def build_cache_parser() -> argparse.ArgumentParser:
+    """Options controlling the on-disk render cache."""
+    cache_opts = argparse.ArgumentParser(add_help=False)
+    cache_opts.add_argument('--no-cache', action='store_true', help='Always re-render, bypassing the render cache')
+    cache_opts.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='Render cache directory')
+    cache_opts.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                            help=f'Render cache size limit in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    return cache_opts
+
+
+def resolve_format(args):
+    """
+    Settle args.format from --format or the output suffix, and give the
+    output path the format's suffix (output.png -> output.svg for --format svg).
+    """
+    suffix = Path(args.output).suffix.lower() if args.output != '-' else ''
+    if args.format is None:
+        args.format = next((fmt for fmt, fmt_suffix in FORMAT_SUFFIXES.items() if fmt_suffix == suffix), 'png')
+    elif args.output != '-' and suffix != FORMAT_SUFFIXES[args.format]:
+        args.output = str(Path(args.output).with_suffix(FORMAT_SUFFIXES[args.format]))
+    if args.format == 'svg' and args.scales not in (None, (1.0,)):
+        raise ValueError("--scales does not apply to --format svg (SVG output is resolution independent)")
+    if args.quality is not None and args.format != 'webp':
+        raise ValueError("--quality only applies to --format webp")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        raise ValueError("--quality must be between 1 and 100")
+    return args
+
+
+def uses_pillow(args) -> bool:
+    """Whether the output goes through a Pillow encoder rather than pixie's PNG writer."""
+    return args.format in ('png8', 'webp') or (args.format == 'png' and args.encode is not None)
+
+
+# Set by build_geometry so new_image records instead of drawing
+_recording = False
+
+
+def build_geometry(command: str, args) -> ScaledImage:
+    """Run a pixie generator on a recording canvas: every path and paint is built, nothing is rasterized."""
+    global _recording
+    _recording = True
+    try:
+        return profiling.unwrap(GENERATORS[command](args))
+    finally:
+        _recording = False
+
+
+def run_generator(command: str, args):
+    """Draw an element with the selected backend, falling back to pixie where numpy can't."""
+    if args.backend == 'numpy' and args.format == 'svg':
+        print("Note: numpy backend does not write SVG; using pixie geometry", file=sys.stderr)
+    elif args.backend == 'numpy' and args.scales not in (None, (1.0,)):
+        print("Note: numpy backend does not support --scales; using pixie", file=sys.stderr)
+    elif args.backend == 'numpy':
+        # Imported on demand so the default pixie backend never loads numpy
+        import numpy_backend
+        if numpy_backend.np is None:
+            raise RuntimeError("numpy not installed. Run: pip install numpy")
+        numpy_generator = numpy_backend.GENERATORS.get(command)
+        with profiling.stage('numpy render'):
+            image = numpy_generator(args) if numpy_generator is not None else None
+        if image is not None:
+            return image
+        print(f"Note: numpy backend does not support {command} --style {args.style}; using pixie", file=sys.stderr)
+    with profiling.stage('path construction'):
+        image = GENERATORS[command](args)
+    return profiling.unwrap(image)
+
+
+def rasterize(image, scale: float = 1.0):
+    """The generator's image at `scale` (recorded images are replayed, others are already final)."""
+    if isinstance(image, ScaledImage):
+        with profiling.stage('rasterize'):
+            return image.render(scale)
+    return image
+
+
+def encode_image(image, args=None) -> bytes:
+    """
+    Encode a rendered image as args.format bytes (PNG by default, SVG bytes
+    for recorded SVG images).
+
+    pixie-python can only encode by writing a file, so pixie images make one
+    round-trip through a temporary file (in /dev/shm where available).
+    """
+    if isinstance(image, SvgImage):
+        return image.encode_svg()
+    if args is not None and uses_pillow(args):
+        return encoders.encode(image, args.format, args.encode, args.quality)
+    if hasattr(image, 'encode_png'):
+        return image.encode_png()
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        path = os.path.join(tmp, 'element.png')
+        image.write_file(path)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def write_image(image, output: str, args) -> int:
+    """Encode a rendered image to `output`. Returns the file size in bytes."""
+    if uses_pillow(args):
+        Path(output).write_bytes(encode_image(image, args))
+    else:
+        image.write_file(output)
+    return os.path.getsize(output)
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+
+
+def write_stdout(data: bytes):
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def cache_from_args(args):
+    """RenderCache configured from command-line options, or None with --no-cache."""
+    if args.no_cache:
+        return None
+    return RenderCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+
+def render_bytes(command: str, args, cache=None) -> tuple:
+    """Render one element to encoded bytes (args.format) in memory. Returns (data, served_from_cache)."""
+    scales = args.scales or (1.0,)
+    if len(scales) > 1:
+        raise ValueError("in-memory and stdout output take a single scale")
+    key = cache.key(command, args, scales[0]) if cache is not None else None
+    if cache is not None:
+        data = cache.get(key, FORMAT_SUFFIXES[args.format])
+        if data is not None:
+            return data, True
+
+    image = rasterize(run_generator(command, args), scales[0])
+    with profiling.stage('encode'):
+        data = encode_image(image, args)
+    if cache is not None:
+        cache.put(key, data, FORMAT_SUFFIXES[args.format])
+    return data, False
+
+
+def element_outputs(args) -> list:
+    """(scale, path) for every file a render writes: name.png, name@2x.png, ..."""
+    return [(scale, scaled_output(args.output, scale)) for scale in args.scales or (1.0,)]
+
+
+def render_element(command: str, args, cache=None, encoded=None) -> bool:
+    """
+    Render one element to args.output ('-' streams the encoded bytes to stdout),
+    once per --scales entry, going through the cache if given.
+
+    Each file written is reported with its encoded size and encode time, and
+    appended to `encoded` (if given) as (output, bytes, seconds).
+    Returns True when every output was served from the cache.
+    """
+    if args.output == '-':
+        data, cached = render_bytes(command, args, cache)
+        write_stdout(data)
+        return cached
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+
+    pending = []
+    for scale, output in element_outputs(args):
+        key = cache.key(command, args, scale) if cache is not None else None
+        if cache is not None and cache.fetch(key, output):
+            print(f"Generated: {output} (cached)")
+        else:
+            pending.append((scale, output, key))
+    if not pending:
+        return True
+
+    # Geometry is built once; each scale only re-rasterizes it
+    image = run_generator(command, args)
+    for scale, output, key in pending:
+        raster = rasterize(image, scale)
+        start = time.perf_counter()
+        with profiling.stage('encode'):
+            size = write_image(raster, output, args)
+        seconds = time.perf_counter() - start
+        print(f"Generated: {output} ({format_size(size)}, encoded in {seconds * 1000:.1f} ms)")
+        if encoded is not None:
+            encoded.append((output, size, seconds))
+        if cache is not None:
+            cache.store(key, output)
+    return False
+
+
+def render(command: str, cache=None, **options) -> bytes:
+    """
+    Render an element in-process and return the encoded bytes (PNG unless
+    format= says otherwise).
+
+    Options are the command-line options with underscores, e.g.
+    render('shape', style='star', fill=True, color='#D4A84B').
+    """
+    if command not in GENERATORS:
+        raise ValueError(f"unknown command: {command!r}")
+    job_parser = JobArgumentParser(prog=command, parents=[build_common_parser()], add_help=False)
+    args = resolve_format(job_parser.parse_args(job_to_argv({**options, 'output': '-'})))
+    args.command = command
+    return render_bytes(command, args, cache)[0]
+
+
+def load_manifest(manifest_path: str) -> list:
+    """
+    Load batch jobs from a JSON, JSONL or YAML manifest.
+
+    JSON/YAML manifests hold either a list of jobs or a mapping with a
+    ``jobs`` list and optional ``defaults`` applied to every job. JSONL
+    manifests hold one job object per line.
+    """
+    path = Path(manifest_path)
+    text = path.read_text(encoding='utf-8')
+    suffix = path.suffix.lower()
+
+    if suffix == '.jsonl':
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            print("Error: PyYAML not installed. Run: pip install pyyaml")
+            sys.exit(1)
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get('defaults') or {}
+        data = data.get('jobs') or []
+    if not isinstance(data, list):
+        raise ValueError(f"{manifest_path}: expected a list of jobs")
+
+    jobs = []
+    for i, job in enumerate(data, 1):
+        if not isinstance(job, dict):
+            raise ValueError(f"{manifest_path}: job {i} is not an object")
+        jobs.append({**defaults, **job})
+    return jobs
+
+
+def job_to_argv(job: dict) -> list:
+    """Turn a manifest job's options into command-line style arguments."""
+    argv = []
+    for key, value in job.items():
+        if key in ('command', 'name') or value is None or value is False:
+            continue
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        else:
+            argv.extend([flag, str(value)])
+    return argv
+
+
+def run_job(index: int, job: dict, cache=None) -> dict:
+    """Render a single manifest job and report how it went."""
+    command = job.get('command')
+    result = {'index': index, 'command': command, 'name': job.get('name'), 'output': job.get('output'),
+              'outputs': [], 'ok': False, 'cached': False, 'error': None, 'bytes': 0, 'encode_seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        if command not in GENERATORS:
+            raise ValueError(f"unknown command: {command!r}")
+        job_parser = JobArgumentParser(prog=command, parents=[build_common_parser()], add_help=False)
+        args = resolve_format(job_parser.parse_args(job_to_argv(job)))
+        args.command = command
+        result['output'] = args.output
+        result['outputs'] = element_outputs(args)
+
+        encoded = []
+        result['cached'] = render_element(command, args, cache, encoded)
+        result['bytes'] = sum(size for _, size, _ in encoded)
+        result['encode_seconds'] = sum(seconds for _, _, seconds in encoded)
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_jobs_parallel(jobs: list, workers: int, cache=None) -> list:
+    """
+    Render jobs across a process pool.
+
+    Each worker process imports this module (and pixie) once and then
+    renders whichever jobs it is handed. Results come back in manifest
+    order regardless of which job finishes first.
+    """
+    # Imported here: concurrent.futures.process pulls in multiprocessing, which single renders never need
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, i, job, cache) for i, job in enumerate(jobs, 1)]
+        for i, (job, future) in enumerate(zip(jobs, futures), 1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # A worker died outright (e.g. crashed in native code)
+                results.append({
+                    'index': i, 'command': job.get('command'), 'name': job.get('name'), 'output': job.get('output'),
+                    'outputs': [], 'ok': False, 'cached': False, 'error': f"worker failed: {e or type(e).__name__}", 'seconds': 0.0,
+                    'bytes': 0, 'encode_seconds': 0.0,
+                })
+    return results
+
+
+def print_cache_stats(cache, results: list):
+    """Report cache hits/misses for the jobs that rendered, then enforce the size limit."""
+    rendered = [r for r in results if r['ok']]
+    hits = sum(1 for r in rendered if r['cached'])
+    evicted = cache.prune()
+    print(f"Cache: {hits} hits, {len(rendered) - hits} misses, {evicted} evicted ({cache.directory})")
+
+
+def write_sprite_sheets(results: list, atlas_path: str, padding: int):
+    """Pack the successful jobs' outputs into one atlas (plus JSON map) per scale."""
+    from sprite_sheet import write_sprite_sheet
+
+    by_scale = {}
+    skipped = 0
+    for r in results:
+        if not r['ok'] or r['output'] == '-':
+            continue
+        if Path(r['output']).suffix.lower() != '.png':
+            skipped += 1
+            continue
+        name = r['name'] or Path(r['output']).stem
+        for scale, output in r['outputs']:
+            sprites = by_scale.setdefault(scale, {})
+            # Keep frame names unique when two jobs share a file stem
+            frame = name if name not in sprites else f"{name}-{r['index']}"
+            sprites[frame] = output
+
+    if skipped:
+        print(f"Note: {skipped} SVG/WebP output(s) left out of the sprite sheet (only PNG frames are packed)")
+    for scale, sprites in sorted(by_scale.items()):
+        output = scaled_output(atlas_path, scale)
+        atlas = write_sprite_sheet(list(sprites.items()), output, scale, padding)
+        size = atlas['size']
+        print(f"Sprite sheet: {output} ({len(sprites)} frames, {size['w']}x{size['h']}, {scale_label(scale)})")
+
+
+def run_batch(args) -> int:
+    """Render every job in a manifest within this process."""
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read manifest: {e}")
+        return 1
+
+    cache = cache_from_args(args)
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        results = [run_job(i, job, cache) for i, job in enumerate(jobs, 1)]
+    else:
+        results = run_jobs_parallel(jobs, min(workers, len(jobs)), cache)
+
+    print(f"\nBatch summary ({len(results)} jobs):")
+    for r in results:
+        if r['ok']:
+            detail = ', cached' if r['cached'] else f", {format_size(r['bytes'])}, encoded in {r['encode_seconds'] * 1000:.1f} ms"
+            print(f"  [ok]   #{r['index']} {r['command']} -> {r['output']} ({r['seconds'] * 1000:.1f} ms{detail})")
+        else:
+            print(f"  [FAIL] #{r['index']} {r['command']}: {r['error']}")
+    failed = sum(1 for r in results if not r['ok'])
+    print(f"{len(results) - failed} succeeded, {failed} failed")
+    if cache is not None:
+        print_cache_stats(cache, results)
+    if args.sprite_sheet:
+        write_sprite_sheets(results, args.sprite_sheet, args.sprite_padding)
+    return 1 if failed else 0
+
+
+def profile_element(args):
+    """Render one element uncached under the stage profiler (and cProfile for .prof output).
+
+    Raises ValueError for bad options, like render_element.
+    """
+    resolve_format(args)
+    profile_output = args.profile_output
+    profiler = cProfile.Profile() if profile_output and profile_output.endswith('.prof') else None
+    with profiling.profile() as stages:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            render_element(args.command, args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    stages.print_summary()
+    if profiler is not None:
+        profiler.dump_stats(profile_output)
+    elif profile_output:
+        stages.write_speedscope(profile_output, f"generate.py {args.command}")
+    if profile_output:
+        print(f"Profile: {profile_output}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate geometric decorative elements')
+    subparsers = parser.add_subparsers(dest='command', help='Element type')
+
+    # Common arguments for all commands
+    common = build_common_parser()
+    cache_opts = build_cache_parser()
+    profile_opts = build_profile_parser()
 
     # Subcommands
-    subparsers.add_parser('corner-accent', parents=[common], help='L-shaped corner accent')
-    subparsers.add_parser('line-divider', parents=[common], help='Horizontal line divider')
-    subparsers.add_parser('arc-accent', parents=[common], help='Curved arc accent')
-    subparsers.add_parser('frame-border', parents=[common], help='Decorative frame border')
-    subparsers.add_parser('pattern', parents=[common], help='Repeating geometric pattern')
-    subparsers.add_parser('mandala', parents=[common], help='Sacred geometry / mandala pattern')
-    subparsers.add_parser('shape', parents=[common], help='Basic geometric shapes')
+    subparsers.add_parser('corner-accent', parents=[common, cache_opts, profile_opts], help='L-shaped corner accent')
+    subparsers.add_parser('line-divider', parents=[common, cache_opts, profile_opts], help='Horizontal line divider')
+    subparsers.add_parser('arc-accent', parents=[common, cache_opts, profile_opts], help='Curved arc accent')
+    subparsers.add_parser('frame-border', parents=[common, cache_opts, profile_opts], help='Decorative frame border')
+    subparsers.add_parser('pattern', parents=[common, cache_opts, profile_opts], help='Repeating geometric pattern')
+    subparsers.add_parser('mandala', parents=[common, cache_opts, profile_opts], help='Sacred geometry / mandala pattern')
+    subparsers.add_parser('shape', parents=[common, cache_opts, profile_opts], help='Basic geometric shapes')
+
+    batch = subparsers.add_parser('batch', parents=[cache_opts], help='Render many elements from a JSON/JSONL/YAML manifest')
+    batch.add_argument('manifest', help='Manifest file: list of jobs with "command" plus element options')
+    batch.add_argument('--workers', '-j', type=int, default=1,
+                       help='Worker processes for rendering (0 = one per CPU core, default: 1)')
+    batch.add_argument('--sprite-sheet', help='Also pack every output into this atlas image, with a .json frame map')
+    batch.add_argument('--sprite-padding', type=int, default=2, help='Pixels between sprite sheet frames (default: 2)')
+
+    serve_parser = subparsers.add_parser('serve', parents=[cache_opts], help='Keep a warm render server running (HTTP or Unix socket)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Listen address (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Listen port (default: 8765)')
+    serve_parser.add_argument('--socket', help='Listen on this Unix socket path instead of TCP')
+    serve_parser.add_argument('--workers', '-j', type=int, default=0,
+                              help='Render worker processes (0 = one per CPU core, default: 0)')
+    serve_parser.add_argument('--queue-size', type=int, default=32,
+                              help='Requests allowed to wait for a worker before answering 503 (default: 32)')
+    serve_parser.add_argument('--render-timeout', type=float, default=60, help='Seconds before a render answers 504')
 
     args = parser.parse_args()
 
@@ -650,21 +1120,31 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    # Ensure output directory exists
-    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    if args.command == 'batch':
+        sys.exit(run_batch(args))
+
+    if args.command == 'serve':
+        from render_server import serve
+        serve(args)
+        return
+
+    if args.backend == 'numpy' and importlib.util.find_spec('numpy') is None:
+        print("Error: numpy not installed. Run: pip install numpy")
+        sys.exit(1)
+    if importlib.util.find_spec('PIL') is None and (args.encode is not None or args.format in ('png8', 'webp')
+                                      or Path(args.output).suffix.lower() == '.webp'):
+        print("Error: Pillow not installed. Run: pip install pillow")
+        sys.exit(1)
 
     # Generate element
-    generators = {
-        'corner-accent': generate_corner_accent,
-        'line-divider': generate_line_divider,
-        'arc-accent': generate_arc_accent,
-        'frame-border': generate_frame_border,
-        'pattern': generate_pattern,
-        'mandala': generate_mandala,
-        'shape': generate_shape,
-    }
-
-    generators[args.command](args)
+    try:
+        if args.profile or args.profile_output:
+            profile_element(args)
+        else:
+            render_element(args.command, resolve_format(args), cache_from_args(args))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,60 @@
+"""
+Geometry Helpers
+Shared vertex tables and direct pixie.Path construction for generate.py.
+
+Regular polygons, stars and mandala rings all place points on a circle.
+The unit-circle (cos, sin) pairs for a given (sides, rotation) are
+computed once and reused, and paths are built with move_to/line_to
+instead of formatting SVG text for pixie.parse_path to read back.
+"""
+
+import math
+from functools import lru_cache
+
+import pixie
+
+# Point straight up, the starting angle most elements use
+TOP = -math.pi / 2
+
+
+@lru_cache(maxsize=512)
+def unit_circle(sides: int, rotation: float = 0.0) -> tuple:
+    """(cos, sin) pairs for `sides` evenly spaced angles starting at `rotation`."""
+    step = 2 * math.pi / sides
+    return tuple((math.cos(step * i + rotation), math.sin(step * i + rotation)) for i in range(sides))
+
+
+def regular_points(cx: float, cy: float, radius: float, sides: int, rotation: float = 0.0) -> list:
+    """Vertices of a regular polygon centred on (cx, cy)."""
+    return [(cx + radius * c, cy + radius * s) for c, s in unit_circle(sides, rotation)]
+
+
+def star_points(cx: float, cy: float, outer_r: float, inner_r: float, points: int, rotation: float = 0.0) -> list:
+    """Vertices of a star alternating between outer and inner radius."""
+    return [
+        (cx + (outer_r if i % 2 == 0 else inner_r) * c, cy + (outer_r if i % 2 == 0 else inner_r) * s)
+        for i, (c, s) in enumerate(unit_circle(points * 2, rotation))
+    ]
+
+
+def polyline_path(points, closed: bool = True, path: pixie.Path = None) -> pixie.Path:
+    """Build (or append to) a path through `points` with move/line calls."""
+    if path is None:
+        path = pixie.Path()
+    x, y = points[0]
+    path.move_to(x, y)
+    for x, y in points[1:]:
+        path.line_to(x, y)
+    if closed:
+        path.close_path()
+    return path
+
+
+def polygon_path(cx: float, cy: float, radius: float, sides: int, rotation: float = 0.0, path: pixie.Path = None) -> pixie.Path:
+    """Closed regular polygon path."""
+    return polyline_path(regular_points(cx, cy, radius, sides, rotation), path=path)
+
+
+def star_path(cx: float, cy: float, outer_r: float, inner_r: float, points: int, rotation: float = 0.0, path: pixie.Path = None) -> pixie.Path:
+    """Closed star path."""
+    return polyline_path(star_points(cx, cy, outer_r, inner_r, points, rotation), path=path)
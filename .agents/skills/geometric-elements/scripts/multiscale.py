@@ -0,0 +1,138 @@
+"""
+Multi-Scale Rendering
+Record an element's drawing calls once and rasterize them at several scales.
+
+ScaledImage stands in for pixie.Image inside the generators: it keeps the
+paths, paints and context state each call used, and render(scale) replays
+them onto a real pixie.Image through a scale transform. Paths are built
+once however many scales are requested.
+"""
+
+import math
+from pathlib import Path
+
+import pixie
+
+
+def parse_scales(text: str) -> tuple:
+    """Parse '1,2,3' (or '1x,1.5x') into a tuple of positive floats."""
+    scales = []
+    for part in text.split(','):
+        part = part.strip().lower().rstrip('x')
+        if not part:
+            continue
+        scale = float(part)
+        if scale <= 0:
+            raise ValueError(f"scale must be positive: {part}")
+        scales.append(scale)
+    if not scales:
+        raise ValueError("no scales given")
+    return tuple(dict.fromkeys(scales))
+
+
+def scale_label(scale: float) -> str:
+    return f"{scale:g}x"
+
+
+def scaled_output(output: str, scale: float) -> str:
+    """'corner.png' at 2x -> 'corner@2x.png'; 1x keeps the plain name."""
+    if scale == 1:
+        return output
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}@{scale_label(scale)}{path.suffix}"))
+
+
+def scaled_paint(paint, scale: float):
+    """Copy of a gradient paint with handles moved to the scaled canvas (pixie doesn't transform them)."""
+    if paint.kind == pixie.SOLID_PAINT:
+        return paint
+    scaled = pixie.Paint(paint.kind)
+    scaled.opacity = paint.opacity
+    scaled.blend_mode = paint.blend_mode
+    for handle in paint.gradient_handle_positions:
+        scaled.gradient_handle_positions.append(pixie.Vector2(handle.x * scale, handle.y * scale))
+    for stop in paint.gradient_stops:
+        scaled.gradient_stops.append(pixie.ColorStop(stop.color, stop.position))
+    return scaled
+
+
+class RecordingContext:
+    """The slice of pixie.Context the generators use, recorded for replay."""
+
+    def __init__(self, ops: list):
+        self.ops = ops
+        # pixie.Context defaults
+        self.stroke_style = None
+        self.line_width = 1.0
+        self.line_cap = pixie.BUTT_CAP
+        self.line_join = pixie.MITER_JOIN
+
+    def stroke_segment(self, ax: float, ay: float, bx: float, by: float):
+        state = (self.stroke_style, self.line_width, self.line_cap, self.line_join)
+        self.ops.append(('segment', state, (ax, ay, bx, by)))
+
+
+class ScaledImage:
+    """Records drawing calls against a width x height canvas."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.ops = []
+        self._rendered = {}
+
+    def new_context(self) -> RecordingContext:
+        return RecordingContext(self.ops)
+
+    def fill_path(self, path, paint):
+        self.ops.append(('fill', path, paint))
+
+    def stroke_path(self, path, paint, transform=None, stroke_width=1.0):
+        # Generators always pass an identity transform; the scale replaces it
+        self.ops.append(('stroke', path, paint, stroke_width))
+
+    def draw(self, other: 'ScaledImage', transform=None):
+        # Only translations are used (pattern tiles)
+        values = list(transform.values) if transform is not None else [1, 0, 0, 0, 1, 0, 0, 0, 1]
+        self.ops.append(('draw', other, values[6], values[7]))
+
+    def render(self, scale: float = 1.0) -> pixie.Image:
+        """Rasterize the recorded calls at `scale`."""
+        if scale in self._rendered:
+            return self._rendered[scale]
+
+        image = pixie.Image(max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+        matrix = pixie.scale(scale, scale)
+        ctx = None
+        paints = {}
+
+        def paint_for(paint):
+            if id(paint) not in paints:
+                paints[id(paint)] = scaled_paint(paint, scale)
+            return paints[id(paint)]
+
+        for op in self.ops:
+            kind = op[0]
+            if kind == 'fill':
+                _, path, paint = op
+                image.fill_path(path, paint_for(paint), matrix)
+            elif kind == 'stroke':
+                _, path, paint, stroke_width = op
+                image.stroke_path(path, paint_for(paint), matrix, stroke_width)
+            elif kind == 'segment':
+                _, (style, line_width, line_cap, line_join), points = op
+                if ctx is None:
+                    ctx = image.new_context()
+                    ctx.scale(scale, scale)
+                ctx.stroke_style = paint_for(style)
+                ctx.line_width = line_width
+                ctx.line_cap = line_cap
+                ctx.line_join = line_join
+                ctx.stroke_segment(*points)
+            elif kind == 'draw':
+                _, other, tx, ty = op
+                # Round halves up: round() goes to even, which would space tiles unevenly
+                image.draw(other.render(scale), pixie.translate(math.floor(tx * scale + 0.5), math.floor(ty * scale + 0.5)))
+
+        self._rendered[scale] = image
+        return image
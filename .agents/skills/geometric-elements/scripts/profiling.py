@@ -0,0 +1,196 @@
+"""
+Render Profiling
+Per-stage wall time, CPU time and allocations for generate.py --profile.
+
+Stages are recorded while a Profiler is active (see profile()): paint
+creation, path construction (the generator's own Python work), each kind
+of drawing call (fill_path, stroke_path, stroke_segment, draw), replaying
+recorded --scales images and encoding. Times are self times: a stage
+nested in another is not counted again in its parent. Allocations are the
+net number of Python memory blocks a stage left allocated
+(sys.getallocatedblocks); pixie's native buffers are not included.
+
+Hook API:
+    with profiling.profile() as profiler:
+        render('mandala', rings=64, layers=12)
+    profiler.print_summary()
+
+    profiler.hooks.append(lambda name, wall, cpu, blocks: ...)  # called as each stage ends
+    with profiling.stage('my step'): ...                         # no-op when not profiling
+"""
+
+import contextlib
+import functools
+import json
+import sys
+import time
+
+_active = None
+
+
+class Profiler:
+    """Accumulates self time per stage, plus an event trace for speedscope."""
+
+    def __init__(self):
+        self.stages = {}  # name -> [calls, wall, cpu, blocks]
+        self.events = []  # (type 'O'/'C', name, perf_counter time)
+        self.hooks = []
+        self.origin = time.perf_counter()
+        self._stack = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        children = [0.0, 0.0, 0]
+        self._stack.append(children)
+        blocks = sys.getallocatedblocks()
+        cpu = time.process_time()
+        start = time.perf_counter()
+        self.events.append(('O', name, start))
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append(('C', name, end))
+            total = (end - start, time.process_time() - cpu, sys.getallocatedblocks() - blocks)
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                for i, value in enumerate(total):
+                    parent[i] += value
+            self.record(name, *(value - child for value, child in zip(total, children)))
+
+    def record(self, name: str, wall: float, cpu: float, blocks: int):
+        stats = self.stages.setdefault(name, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += wall
+        stats[2] += cpu
+        stats[3] += blocks
+        for hook in self.hooks:
+            hook(name, wall, cpu, blocks)
+
+    def summary(self) -> list:
+        """One dict per stage, in the order stages first ran."""
+        return [{'stage': name, 'calls': calls, 'wall_ms': wall * 1000, 'cpu_ms': cpu * 1000, 'blocks': blocks}
+                for name, (calls, wall, cpu, blocks) in self.stages.items()]
+
+    def print_summary(self, file=None):
+        file = file or sys.stderr
+        rows = self.summary()
+        print("\nProfile (self time per stage):", file=file)
+        print(f"  {'stage':<20} {'calls':>8} {'wall ms':>10} {'cpu ms':>10} {'blocks':>9}", file=file)
+        for row in rows:
+            print(f"  {row['stage']:<20} {row['calls']:>8} {row['wall_ms']:>10.2f} {row['cpu_ms']:>10.2f} "
+                  f"{row['blocks']:>9}", file=file)
+        print(f"  {'total':<20} {sum(r['calls'] for r in rows):>8} {sum(r['wall_ms'] for r in rows):>10.2f} "
+              f"{sum(r['cpu_ms'] for r in rows):>10.2f} {sum(r['blocks'] for r in rows):>9}", file=file)
+
+    def speedscope(self, name: str = 'render') -> dict:
+        """The stage trace as a speedscope evented profile (https://www.speedscope.app)."""
+        frames = {}
+        events = []
+        for kind, stage_name, t in self.events:
+            frame = frames.setdefault(stage_name, len(frames))
+            events.append({'type': kind, 'frame': frame, 'at': round((t - self.origin) * 1000, 4)})
+        end = events[-1]['at'] if events else 0
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': stage_name} for stage_name in frames]},
+            'profiles': [{'type': 'evented', 'name': name, 'unit': 'milliseconds',
+                          'startValue': 0, 'endValue': end, 'events': events}],
+        }
+
+    def write_speedscope(self, path: str, name: str = 'render'):
+        with open(path, 'w') as f:
+            json.dump(self.speedscope(name), f)
+
+
+def active():
+    """The Profiler currently recording, or None."""
+    return _active
+
+
+@contextlib.contextmanager
+def profile(profiler: Profiler = None):
+    """Record stages into `profiler` (a new one by default) for the duration of the block."""
+    global _active
+    previous = _active
+    _active = profiler or Profiler()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def stage(name: str):
+    """Context manager timing `name` on the active profiler; does nothing when not profiling."""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.stage(name)
+
+
+def profiled(name: str):
+    """Decorator recording every call of a function (cache hits included) as stage `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with _active.stage(name):
+                return fn(*args, **kwargs)
+        # Keep an lru_cache's cache_info()/cache_clear() reachable through the wrapper
+        for attr in ('cache_info', 'cache_clear', 'cache_parameters'):
+            if hasattr(fn, attr):
+                setattr(wrapper, attr, getattr(fn, attr))
+        return wrapper
+    return decorate
+
+
+class ProfiledContext:
+    """Wraps a drawing context so each stroke_segment is recorded."""
+
+    def __init__(self, ctx):
+        object.__setattr__(self, 'ctx', ctx)
+
+    def __getattr__(self, name):
+        return getattr(self.ctx, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.ctx, name, value)
+
+    def stroke_segment(self, *args):
+        with stage('stroke_segment'):
+            self.ctx.stroke_segment(*args)
+
+
+class ProfiledImage:
+    """Wraps a canvas (pixie.Image, ScaledImage or SvgImage) so each drawing call is recorded."""
+
+    def __init__(self, image):
+        self.image = image
+
+    def __getattr__(self, name):
+        return getattr(self.image, name)
+
+    def new_context(self):
+        return ProfiledContext(self.image.new_context())
+
+    def fill_path(self, *args):
+        with stage('fill_path'):
+            self.image.fill_path(*args)
+
+    def stroke_path(self, *args, **kwargs):
+        with stage('stroke_path'):
+            self.image.stroke_path(*args, **kwargs)
+
+    def draw(self, other, *args):
+        with stage('draw'):
+            self.image.draw(unwrap(other), *args)
+
+
+def wrap(image):
+    """`image` wrapped for recording while a profiler is active, else unchanged."""
+    return ProfiledImage(image) if _active is not None else image
+
+
+def unwrap(image):
+    return image.image if isinstance(image, ProfiledImage) else image
@@ -0,0 +1,171 @@
+"""
+Render Cache
+Content-addressed on-disk cache of encoded element images.
+
+Entries are keyed on the command name, every generator option and the
+versions of pixie and of these scripts, so an unchanged asset is copied
+out of the cache instead of being redrawn and re-encoded.
+
+Pruning walks the whole cache, so it is not done per render: each write
+appends a byte to a marker file, and once PRUNE_EVERY writes have piled
+up the writer that crosses the mark prunes. Batch runs and the render
+server also prune when they finish or periodically.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('GEOMETRIC_ELEMENTS_CACHE', Path.home() / '.cache' / 'geometric-elements'))
+DEFAULT_CACHE_SIZE_MB = 256
+# Writes between automatic prunes
+PRUNE_EVERY = 100
+# Marker file counting writes since the last prune (one byte each)
+WRITES_MARKER = 'writes'
+
+# Options that control how a render is run rather than what it looks like
+NON_RENDER_FIELDS = {'output', 'no_cache', 'cache_dir', 'cache_size', 'workers', 'manifest', 'scales',
+                     'profile', 'profile_output'}
+
+
+@lru_cache(maxsize=None)
+def pixie_version() -> str:
+    """Installed pixie-python version, or 'unknown'."""
+    # Read off the dist-info directory name; importing importlib.metadata alone costs ~25 ms
+    spec = importlib.util.find_spec('pixie')
+    if spec is not None and spec.origin:
+        for dist_info in Path(spec.origin).parent.parent.glob('pixie_python-*.dist-info'):
+            return dist_info.name[len('pixie_python-'):-len('.dist-info')]
+    return 'unknown'
+
+
+def _scripts_digest() -> str:
+    """Hash of the generator sources, so code changes invalidate old entries."""
+    digest = hashlib.sha256()
+    for source in sorted(Path(__file__).parent.glob('*.py')):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered files, shared between processes."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.pixie_version = pixie_version()
+        self.scripts_digest = _scripts_digest()
+
+    def key(self, command: str, args, scale: float = 1.0) -> str:
+        """Content hash for a render of `command` with the given options at one scale."""
+        fields = {k: v for k, v in sorted(vars(args).items()) if k not in NON_RENDER_FIELDS}
+        payload = json.dumps({
+            'command': command,
+            'args': fields,
+            'format': self.suffix(args.output),
+            'scale': scale,
+            'pixie': self.pixie_version,
+            'scripts': self.scripts_digest,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def suffix(output: str) -> str:
+        """File format of an output path; stdout ('-') is always PNG."""
+        return '.png' if output == '-' else Path(output).suffix.lower()
+
+    def _entry(self, key: str, suffix: str) -> Path:
+        return self.directory / key[:2] / f"{key}{suffix.lower()}"
+
+    def get(self, key: str, suffix: str = '.png'):
+        """Cached bytes for `key`, or None on a miss."""
+        entry = self._entry(key, suffix)
+        try:
+            data = entry.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(entry)
+        return data
+
+    def put(self, key: str, data: bytes, suffix: str = '.png'):
+        """Add encoded bytes to the cache."""
+        entry = self._entry(key, suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, entry)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._written()
+
+    def fetch(self, key: str, output: str) -> bool:
+        """Copy a cached render to `output`. Returns False on a miss."""
+        entry = self._entry(key, Path(output).suffix)
+        try:
+            shutil.copyfile(entry, output)
+        except FileNotFoundError:
+            return False
+        # Mark as recently used for LRU eviction
+        os.utime(entry)
+        return True
+
+    def store(self, key: str, output: str):
+        """Add a freshly written render to the cache."""
+        entry = self._entry(key, Path(output).suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so concurrent workers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output, tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._written()
+
+    def _written(self):
+        """Count a write, pruning once PRUNE_EVERY have accumulated since the last prune."""
+        marker = self.directory / WRITES_MARKER
+        # O_APPEND writes are atomic, so concurrent writers each add exactly one byte
+        fd = os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, b'.')
+            writes = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if writes >= PRUNE_EVERY:
+            self.prune()
+
+    def prune(self) -> int:
+        """Evict least recently used entries until under the size limit. Returns entries removed."""
+        (self.directory / WRITES_MARKER).unlink(missing_ok=True)
+        entries = []
+        total = 0
+        for path in self.directory.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
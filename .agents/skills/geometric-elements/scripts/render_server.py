@@ -0,0 +1,275 @@
+"""
+Render Server
+Keep a warm generate.py process answering render requests over HTTP.
+
+Endpoints:
+    POST /render   JSON body: {"command": "shape", "style": "star", ...}
+                   Returns the image (PNG, or "format": png8/webp/svg), or
+                   {"output": path} if "output" is a path ("-" or null
+                   returns the image like no "output").
+    GET  /metrics  JSON: request counts, queue depth, render latency percentiles
+    GET  /health   "ok"
+
+Requests are rendered on a process pool. At most workers + queue_size
+requests are admitted at once; beyond that the server answers 503 so
+callers can back off instead of piling up.
+"""
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from generate import (
+    CONTENT_TYPES, GENERATORS, JobArgumentParser, build_common_parser, cache_from_args, job_to_argv, render_bytes,
+    render_element, resolve_format,
+)
+
+# Latency samples kept for percentile reporting
+LATENCY_WINDOW = 2048
+# How often the render cache is trimmed back to its size limit
+CACHE_PRUNE_INTERVAL = 60
+
+
+def render_request(job: dict, cache=None) -> dict:
+    """Render one request in a worker process."""
+    command = job.get('command')
+    if command not in GENERATORS:
+        return {'status': 400, 'error': f"unknown command: {command!r}"}
+    try:
+        job_parser = JobArgumentParser(prog=command, parents=[build_common_parser()], add_help=False)
+        args = resolve_format(job_parser.parse_args(job_to_argv(job)))
+    except ValueError as e:
+        return {'status': 400, 'error': str(e)}
+    args.command = command
+
+    start = time.perf_counter()
+    try:
+        if job.get('output') not in (None, '-'):
+            # Generators report progress on stdout; keep it out of the server log
+            with contextlib.redirect_stdout(io.StringIO()):
+                cached = render_element(command, args, cache)
+            body = None
+        else:
+            body, cached = render_bytes(command, args, cache)
+    except ValueError as e:
+        return {'status': 400, 'error': str(e)}
+    except Exception as e:
+        return {'status': 500, 'error': str(e) or type(e).__name__}
+    return {'status': 200, 'body': body, 'output': args.output, 'format': args.format, 'cached': cached,
+            'seconds': time.perf_counter() - start}
+
+
+class RenderMetrics:
+    """Thread-safe counters and a sliding window of render latencies."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.in_flight = 0
+        self.started = time.time()
+
+    def record(self, seconds: float, ok: bool, cached: bool = False):
+        with self.lock:
+            self.requests += 1
+            if ok:
+                self.latencies.append(seconds)
+                self.cache_hits += cached
+            else:
+                self.errors += 1
+
+    def snapshot(self, workers: int) -> dict:
+        with self.lock:
+            samples = sorted(self.latencies)
+            in_flight = self.in_flight
+            counts = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'cache_hits': self.cache_hits,
+            }
+
+        def percentile(p):
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 3)
+
+        return {
+            **counts,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'in_flight': in_flight,
+            'queue_depth': max(0, in_flight - workers),
+            'workers': workers,
+            'latency_ms': {
+                'samples': len(samples),
+                'p50': percentile(50),
+                'p90': percentile(90),
+                'p99': percentile(99),
+                'max': percentile(100),
+            },
+        }
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = 'GeometricElements/1.0'
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            body = b'ok'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/metrics':
+            self.send_json(200, self.server.metrics.snapshot(self.server.workers))
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(job, dict):
+                raise ValueError('request body must be a JSON object')
+        except ValueError as e:
+            self.send_json(400, {'error': f"invalid JSON: {e}"})
+            return
+
+        server = self.server
+        if not server.slots.acquire(blocking=False):
+            with server.metrics.lock:
+                server.metrics.rejected += 1
+            self.send_json(503, {'error': 'render queue full'})
+            return
+
+        def release(_future=None):
+            with server.metrics.lock:
+                server.metrics.in_flight -= 1
+            server.slots.release()
+
+        with server.metrics.lock:
+            server.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            future = server.pool.submit(render_request, job, server.cache)
+        except Exception:
+            release()
+            raise
+        # A render that times out keeps its worker busy, so its slot is freed when it finishes, not here
+        future.add_done_callback(release)
+        try:
+            result = future.result(timeout=server.render_timeout)
+        except FutureTimeout:
+            future.cancel()  # frees the slot now if the render never started
+            result = {'status': 504, 'error': f"render exceeded {server.render_timeout}s"}
+        except Exception as e:
+            result = {'status': 500, 'error': f"worker failed: {e or type(e).__name__}"}
+
+        ok = result['status'] == 200
+        server.metrics.record(time.perf_counter() - start, ok, result.get('cached', False))
+        if not ok:
+            self.send_json(result['status'], {'error': result['error']})
+        elif result['body'] is None:
+            self.send_json(200, {'output': result['output'], 'cached': result['cached']})
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[result['format']])
+            self.send_header('Content-Length', str(len(result['body'])))
+            self.send_header('X-Render-Seconds', f"{result['seconds']:.6f}")
+            self.send_header('X-Cache', 'hit' if result['cached'] else 'miss')
+            self.end_headers()
+            self.wfile.write(result['body'])
+
+
+class UnixRenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def ignore_interrupts():
+    """Worker initializer: let the parent process handle Ctrl-C and shut the pool down."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def stop_serving(signum, frame):
+    raise KeyboardInterrupt
+
+
+def prune_periodically(cache, stop: threading.Event):
+    while not stop.wait(CACHE_PRUNE_INTERVAL):
+        cache.prune()
+
+
+def serve(args):
+    """Run the render server until interrupted."""
+    workers = args.workers or os.cpu_count() or 1
+    if args.socket:
+        Path(args.socket).unlink(missing_ok=True)
+        server = UnixRenderServer(args.socket, RenderHandler)
+        where = f"unix:{args.socket}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), RenderHandler)
+        where = f"http://{args.host}:{server.server_address[1]}"
+
+    server.workers = workers
+    server.cache = cache_from_args(args)
+    server.render_timeout = args.render_timeout
+    server.metrics = RenderMetrics()
+    server.slots = threading.BoundedSemaphore(workers + args.queue_size)
+    server.pool = ProcessPoolExecutor(max_workers=workers, initializer=ignore_interrupts)
+
+    # pixie's native runtime installs its own SIGINT handler that exits on the spot;
+    # take the signals back so the socket and pool are cleaned up
+    signal.signal(signal.SIGINT, stop_serving)
+    signal.signal(signal.SIGTERM, stop_serving)
+
+    stop = threading.Event()
+    if server.cache is not None:
+        threading.Thread(target=prune_periodically, args=(server.cache, stop), daemon=True).start()
+
+    print(f"Serving geometric elements on {where} ({workers} workers, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A second signal during cleanup ends the process immediately
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        stop.set()
+        server.server_close()
+        server.pool.shutdown(cancel_futures=True)
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
+        if server.cache is not None:
+            server.cache.prune()
+        print("Server stopped")
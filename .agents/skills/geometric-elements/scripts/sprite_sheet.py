@@ -0,0 +1,63 @@
+"""
+Sprite Sheet
+Pack rendered elements into one atlas image plus a JSON coordinate map.
+"""
+
+import json
+import math
+from pathlib import Path
+
+import pixie
+
+
+def pack_shelves(sizes: list, padding: int = 2) -> tuple:
+    """
+    Place (width, height) boxes on horizontal shelves, tallest first.
+
+    Returns ([(x, y), ...] in input order, atlas_width, atlas_height).
+    """
+    if not sizes:
+        return [], 0, 0
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    # Aim for a roughly square atlas, but never narrower than the widest sprite
+    max_width = max(max(w for w, _ in sizes), math.ceil(math.sqrt(area)))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = atlas_width = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        if x > 0 and x + w > max_width:
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[i] = (x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+        atlas_width = max(atlas_width, x - padding)
+    return positions, atlas_width, y + shelf_height
+
+
+def write_sprite_sheet(sprites: list, atlas_path: str, scale: float = 1.0, padding: int = 2) -> dict:
+    """
+    Pack (name, png_path) sprites into `atlas_path` and write the map next to it as .json.
+
+    Returns the coordinate map.
+    """
+    images = [(name, pixie.read_image(path)) for name, path in sprites]
+    positions, width, height = pack_shelves([(image.width, image.height) for _, image in images], padding)
+
+    atlas = pixie.Image(max(1, width), max(1, height))
+    frames = {}
+    for (name, image), (x, y) in zip(images, positions):
+        atlas.draw(image, pixie.translate(x, y))
+        frames[name] = {'x': x, 'y': y, 'w': image.width, 'h': image.height}
+
+    Path(atlas_path).parent.mkdir(parents=True, exist_ok=True)
+    atlas.write_file(atlas_path)
+    coordinate_map = {
+        'image': Path(atlas_path).name,
+        'scale': scale,
+        'size': {'w': atlas.width, 'h': atlas.height},
+        'frames': frames,
+    }
+    Path(atlas_path).with_suffix('.json').write_text(json.dumps(coordinate_map, indent=2), encoding='utf-8')
+    return coordinate_map
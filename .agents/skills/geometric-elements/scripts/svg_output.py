@@ -0,0 +1,215 @@
+"""
+SVG Output
+Record an element's drawing calls and write them as an SVG document.
+
+SvgImage stands in for pixie.Image inside the generators, the way
+multiscale.ScaledImage does, and SvgPath for pixie.Path: paths keep SVG
+path data instead of being flattened, gradients become
+<linearGradient>/<radialGradient> defs and stamped tiles become <use>
+references, so nothing is rasterized and the file stays small at any size.
+"""
+
+import re
+
+import pixie
+
+CAPS = {pixie.BUTT_CAP: 'butt', pixie.ROUND_CAP: 'round', pixie.SQUARE_CAP: 'square'}
+JOINS = {pixie.MITER_JOIN: 'miter', pixie.ROUND_JOIN: 'round', pixie.BEVEL_JOIN: 'bevel'}
+
+NUMBER = re.compile(r'-?\d*\.\d+(?:[eE][-+]?\d+)?')
+
+
+def num(value: float) -> str:
+    """Shortest form of `value` to 2 decimals: 12.5, 3, -0.25."""
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def color_hex(color) -> str:
+    return '#' + ''.join(f"{round(min(1.0, max(0.0, c)) * 255):02x}" for c in (color.r, color.g, color.b))
+
+
+class SvgPath:
+    """The slice of pixie.Path the generators use, kept as SVG path data."""
+
+    def __init__(self, data: str = None):
+        # Parsed paths (arcs, hearts) arrive as SVG text already; just compact it
+        self.parts = [NUMBER.sub(lambda m: num(float(m.group())), ' '.join(data.split()))] if data else []
+
+    def move_to(self, x: float, y: float):
+        self.parts.append(f"M{num(x)} {num(y)}")
+
+    def line_to(self, x: float, y: float):
+        self.parts.append(f"L{num(x)} {num(y)}")
+
+    def close_path(self):
+        self.parts.append('Z')
+
+    def rect(self, x: float, y: float, w: float, h: float):
+        self.parts.append(f"M{num(x)} {num(y)}h{num(w)}v{num(h)}h{num(-w)}Z")
+
+    def rounded_rect(self, x: float, y: float, w: float, h: float, nw: float, ne: float, se: float, sw: float):
+        self.parts.append(
+            f"M{num(x + nw)} {num(y)}H{num(x + w - ne)}A{num(ne)} {num(ne)} 0 0 1 {num(x + w)} {num(y + ne)}"
+            f"V{num(y + h - se)}A{num(se)} {num(se)} 0 0 1 {num(x + w - se)} {num(y + h)}"
+            f"H{num(x + sw)}A{num(sw)} {num(sw)} 0 0 1 {num(x)} {num(y + h - sw)}"
+            f"V{num(y + nw)}A{num(nw)} {num(nw)} 0 0 1 {num(x + nw)} {num(y)}Z"
+        )
+
+    def ellipse(self, cx: float, cy: float, rx: float, ry: float):
+        # Two half arcs, counter-clockwise like pixie's ellipse so non-zero filling matches
+        radii = f"{num(rx)} {num(ry)}"
+        self.parts.append(
+            f"M{num(cx + rx)} {num(cy)}A{radii} 0 1 0 {num(cx - rx)} {num(cy)}"
+            f"A{radii} 0 1 0 {num(cx + rx)} {num(cy)}Z"
+        )
+
+    def data(self) -> str:
+        return ''.join(self.parts)
+
+
+class SvgContext:
+    """The slice of pixie.Context the generators use, recorded as segments."""
+
+    def __init__(self, ops: list):
+        self.ops = ops
+        # pixie.Context defaults
+        self.stroke_style = None
+        self.line_width = 1.0
+        self.line_cap = pixie.BUTT_CAP
+        self.line_join = pixie.MITER_JOIN
+
+    def stroke_segment(self, ax: float, ay: float, bx: float, by: float):
+        state = (self.stroke_style, self.line_width, self.line_cap, self.line_join)
+        self.ops.append(('segment', state, f"M{num(ax)} {num(ay)}L{num(bx)} {num(by)}"))
+
+
+class SvgImage:
+    """Records drawing calls against a width x height canvas for SVG output."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.ops = []
+
+    def new_context(self) -> SvgContext:
+        return SvgContext(self.ops)
+
+    def fill_path(self, path: SvgPath, paint):
+        self.ops.append(('fill', path.data(), paint))
+
+    def stroke_path(self, path: SvgPath, paint, transform=None, stroke_width=1.0):
+        # Generators always pass an identity transform
+        self.ops.append(('stroke', path.data(), paint, stroke_width))
+
+    def draw(self, other: 'SvgImage', transform=None):
+        # Only translations are used (pattern tiles)
+        values = list(transform.values) if transform is not None else [1, 0, 0, 0, 1, 0, 0, 0, 1]
+        self.ops.append(('draw', other, values[6], values[7]))
+
+    def encode_svg(self) -> bytes:
+        return SvgWriter().document(self).encode()
+
+    def write_file(self, file_path: str):
+        with open(file_path, 'wb') as f:
+            f.write(self.encode_svg())
+
+
+def opaque(paint) -> bool:
+    return paint.kind == pixie.SOLID_PAINT and paint.color.a * paint.opacity >= 1
+
+
+class SvgWriter:
+    """Serializes an SvgImage, sharing one def per gradient and per stamped image."""
+
+    def __init__(self):
+        self.defs = []
+        self.ids = {}
+        self.counts = {}
+
+    def document(self, image: SvgImage) -> str:
+        body = self.elements(image)
+        xlink = ' xmlns:xlink="http://www.w3.org/1999/xlink"' if 'e' in self.counts else ''
+        head = (f'<svg xmlns="http://www.w3.org/2000/svg"{xlink} width="{image.width}" height="{image.height}" '
+                f'viewBox="0 0 {image.width} {image.height}">')
+        defs = f"<defs>{''.join(self.defs)}</defs>" if self.defs else ''
+        return f"{head}{defs}{''.join(body)}</svg>\n"
+
+    def _def_id(self, obj, prefix: str) -> tuple:
+        """(id, is_new) for a paint or image, numbered in order of first use."""
+        key = id(obj)
+        if key in self.ids:
+            return self.ids[key], False
+        self.counts[prefix] = self.counts.get(prefix, 0) + 1
+        self.ids[key] = f"{prefix}{self.counts[prefix]}"
+        return self.ids[key], True
+
+    def paint(self, paint, prop: str) -> str:
+        """fill="..." / stroke="..." attributes for a pixie paint."""
+        if paint.kind == pixie.SOLID_PAINT:
+            attrs = f'{prop}="{color_hex(paint.color)}"'
+            alpha = paint.color.a * paint.opacity
+            return attrs + (f' {prop}-opacity="{num(alpha)}"' if alpha < 1 else '')
+
+        gradient_id, new = self._def_id(paint, 'g')
+        if new:
+            handles = list(paint.gradient_handle_positions)
+            stops = ''.join(
+                f'<stop offset="{num(stop.position)}" stop-color="{color_hex(stop.color)}"'
+                + (f' stop-opacity="{num(stop.color.a)}"' if stop.color.a < 1 else '') + '/>'
+                for stop in paint.gradient_stops
+            )
+            if paint.kind == pixie.RADIAL_GRADIENT_PAINT:
+                center, edge = handles[0], handles[1]
+                radius = ((edge.x - center.x) ** 2 + (edge.y - center.y) ** 2) ** 0.5
+                self.defs.append(f'<radialGradient id="{gradient_id}" gradientUnits="userSpaceOnUse" '
+                                 f'cx="{num(center.x)}" cy="{num(center.y)}" r="{num(radius)}">{stops}</radialGradient>')
+            else:
+                start, end = handles[0], handles[1]
+                self.defs.append(f'<linearGradient id="{gradient_id}" gradientUnits="userSpaceOnUse" '
+                                 f'x1="{num(start.x)}" y1="{num(start.y)}" x2="{num(end.x)}" y2="{num(end.y)}">'
+                                 f'{stops}</linearGradient>')
+        attrs = f'{prop}="url(#{gradient_id})"'
+        return attrs + (f' {prop}-opacity="{num(paint.opacity)}"' if paint.opacity < 1 else '')
+
+    def stroke(self, paint, width: float, cap=pixie.BUTT_CAP, join=pixie.MITER_JOIN) -> str:
+        attrs = f'fill="none" {self.paint(paint, "stroke")} stroke-width="{num(width)}"'
+        if cap != pixie.BUTT_CAP:
+            attrs += f' stroke-linecap="{CAPS[cap]}"'
+        if join != pixie.MITER_JOIN:
+            attrs += f' stroke-linejoin="{JOINS[join]}"'
+        return attrs
+
+    def elements(self, image: SvgImage) -> list:
+        out = []
+        ops = image.ops
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            kind = op[0]
+            if kind == 'fill':
+                _, data, paint = op
+                out.append(f'<path d="{data}" {self.paint(paint, "fill")}/>')
+            elif kind == 'stroke':
+                _, data, paint, stroke_width = op
+                out.append(f'<path d="{data}" {self.stroke(paint, stroke_width)}/>')
+            elif kind == 'segment':
+                state = op[1]
+                data = [op[2]]
+                # Consecutive segments in one opaque style share a path; translucent
+                # ones stay separate so overlaps blend as they do when rasterized
+                if opaque(state[0]):
+                    while i + 1 < len(ops) and ops[i + 1][0] == 'segment' and ops[i + 1][1] == state:
+                        i += 1
+                        data.append(ops[i][2])
+                style, line_width, line_cap, line_join = state
+                out.append(f'<path d="{"".join(data)}" {self.stroke(style, line_width, line_cap, line_join)}/>')
+            elif kind == 'draw':
+                _, other, tx, ty = op
+                group_id, new = self._def_id(other, 'e')
+                if new:
+                    self.defs.append(f'<g id="{group_id}">{"".join(self.elements(other))}</g>')
+                position = (f' x="{num(tx)}"' if tx else '') + (f' y="{num(ty)}"' if ty else '')
+                out.append(f'<use xlink:href="#{group_id}"{position}/>')
+            i += 1
+        return out
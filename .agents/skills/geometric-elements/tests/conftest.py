@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+pixie = pytest.importorskip('pixie')
+np = pytest.importorskip('numpy')
+
+
+def pixie_pixels(image):
+    """Straight-alpha uint8 RGBA array of a pixie image, read back from an uncompressed BMP."""
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        path = os.path.join(tmp, 'image.bmp')
+        image.write_file(path)
+        data = Path(path).read_bytes()
+    offset = int.from_bytes(data[10:14], 'little')
+    rows = np.frombuffer(data, dtype=np.uint8, count=image.width * image.height * 4, offset=offset)
+    return rows.reshape(image.height, image.width, 4)[::-1]
+
+
+def premultiplied(rgba):
+    """Premultiplied 0-255 float copy of straight-alpha RGBA pixels."""
+    rgba = rgba.astype(np.float64)
+    rgba[..., :3] *= rgba[..., 3:] / 255
+    return rgba
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import np, pixie, pixie_pixels, premultiplied
+from generate import GENERATORS, build_common_parser
+import numpy_backend
+
+# Largest per-pixel difference from pixie (0-255, premultiplied): edges are
+# rasterized the same way and differ only by rounding
+MAX_DIFF = 8
+# Gradients are interpolated a few levels apart across the whole shape
+MEAN_DIFF = 1.0
+
+CASES = [
+    ('shape', ['--style', 'circle']),
+    ('shape', ['--style', 'circle', '--fill']),
+    ('shape', ['--style', 'circle', '--stroke', '2', '--size', '123']),
+    ('shape', ['--style', 'circle', '--fill', '--size', '57', '--opacity', '0.5']),
+    ('shape', ['--style', 'square']),
+    ('shape', ['--style', 'rectangle', '--fill']),
+    ('shape', ['--style', 'ring']),
+    ('shape', ['--style', 'ring', '--stroke', '9', '--size', '301']),
+    ('shape', ['--style', 'ring', '--fill', '--bg', '#101010']),
+    ('shape', ['--style', 'circle', '--fill', '--gradient', 'linear', '--color2', '#3366FF']),
+    ('shape', ['--style', 'square', '--fill', '--gradient', 'radial', '--color2', '#FFFFFF', '--opacity', '0.8']),
+    ('pattern', ['--style', 'dots', '--size', '20', '--stroke', '2']),
+    ('pattern', ['--style', 'dots', '--size', '13', '--stroke', '1.5', '--width', '301', '--height', '211']),
+]
+
+
+def render_both(command, options):
+    args = build_common_parser().parse_args(options)
+    args.command = command
+    args.format = 'png'
+    canvas = numpy_backend.GENERATORS[command](args)
+    assert canvas is not None
+    return premultiplied(pixie_pixels(GENERATORS[command](args))), premultiplied(canvas.to_rgba8())
+
+
+@pytest.mark.parametrize('command, options', CASES, ids=[' '.join([c] + o) for c, o in CASES])
+def test_matches_pixie(command, options):
+    expected, actual = render_both(command, options)
+    assert actual.shape == expected.shape
+    diff = np.abs(actual - expected).max(axis=-1)
+    assert diff.max() <= MAX_DIFF
+    assert diff.mean() <= MEAN_DIFF
+
+
+def test_solid_fills_match_pixie_footprint():
+    for command, options in CASES:
+        if '--gradient' in options:
+            continue
+        expected, actual = render_both(command, options)
+        assert ((expected[..., 3] > 0) == (actual[..., 3] > 0)).all(), options
+
+
+def test_ellipse_polygon_matches_pixie_flattening():
+    for radius in (2.5, 8.7, 40.2, 100.3):
+        canvas = numpy_backend.Canvas(240, 240)
+        coverage = numpy_backend.circle_coverage(canvas, 120, 120.5, radius)
+        image = pixie.Image(240, 240)
+        path = pixie.Path()
+        path.ellipse(120, 120.5, radius, radius)
+        paint = pixie.Paint(pixie.SOLID_PAINT)
+        paint.color = pixie.Color(1, 1, 1, 1)
+        image.fill_path(path, paint)
+        alpha = pixie_pixels(image)[..., 3].astype(np.float64)
+        assert np.abs(coverage * 255 - alpha).max() <= 2, radius
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+import pytest
+
+import generate
+import profiling
+
+
+def test_profiled_keeps_lru_cache_api():
+    @profiling.profiled('square')
+    @lru_cache(maxsize=4)
+    def square(x):
+        return x * x
+
+    square.cache_clear()
+    with profiling.profile() as profiler:
+        assert square(3) == 9
+        assert square(3) == 9
+    info = square.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, 4)
+    assert profiler.stages['square'][0] == 2
+    square.cache_clear()
+    assert square.cache_info().currsize == 0
+
+
+def test_paint_factories_expose_cache_info():
+    for factory in (generate.create_solid_paint, generate.create_linear_gradient, generate.create_radial_gradient):
+        factory.cache_clear()
+        assert factory.cache_info().currsize == 0
+    generate.create_solid_paint('#FF0000', 1.0)
+    generate.create_solid_paint('#FF0000', 1.0)
+    assert generate.create_solid_paint.cache_info().hits == 1
+
+
+def test_profile_reports_bad_options_like_a_plain_run(monkeypatch, tmp_path, capsys):
+    output = tmp_path / 'x.png'
+    monkeypatch.setattr('sys.argv', ['generate.py', 'mandala', '--profile', '--color', 'zz', '-o', str(output)])
+    with pytest.raises(SystemExit) as exit_info:
+        generate.main()
+    assert exit_info.value.code == 1
+    assert capsys.readouterr().err.startswith('Error: ')
+    assert not output.exists()
+
+
+def test_build_geometry_records_without_changing_later_renders():
+    args = generate.build_common_parser().parse_args(['--size', '64'])
+    args.command, args.format = 'mandala', 'png'
+    recorded = generate.build_geometry('mandala', args)
+    assert isinstance(recorded, generate.ScaledImage)
+    assert args.scales is None
+    assert isinstance(generate.run_generator('mandala', args), generate.pixie.Image)
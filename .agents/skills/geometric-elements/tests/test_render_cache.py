@@ -0,0 +1,31 @@
+import render_cache
+from render_cache import RenderCache
+
+
+def entries(cache):
+    return sorted(path.name for path in cache.directory.glob('*/*'))
+
+
+def test_writes_prune_every_n(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache, 'PRUNE_EVERY', 3)
+    cache = RenderCache(tmp_path, max_bytes=15)
+    cache.put('00' + 'a' * 62, b'x' * 10)
+    cache.put('01' + 'a' * 62, b'x' * 10)
+    # Over the limit, but the third write is the one that prunes
+    assert len(entries(cache)) == 2
+    cache.put('02' + 'a' * 62, b'x' * 10)
+    assert len(entries(cache)) == 1
+    assert not (tmp_path / render_cache.WRITES_MARKER).exists()
+
+
+def test_hits_do_not_count_as_writes(tmp_path):
+    cache = RenderCache(tmp_path)
+    key = 'ab' * 32
+    cache.put(key, b'data')
+    for _ in range(5):
+        assert cache.get(key) == b'data'
+    assert (tmp_path / render_cache.WRITES_MARKER).stat().st_size == 1
+
+
+def test_pixie_version_reads_dist_info():
+    assert render_cache.pixie_version() != 'unknown'
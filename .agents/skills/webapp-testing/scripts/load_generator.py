@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP load generator driven by a JSON scenario file.
+
+Scenario:
+    {
+      "concurrency": 20,            # simultaneous connections (default 10)
+      "duration": 10,               # seconds to run ...
+      "count": 5000,                # ... or total requests (default: 10s duration)
+      "keep_alive": true,           # reuse connections (default true)
+      "timeout": 10,                # per-request timeout in seconds
+      "max_error_rate": 0.01,       # fail (exit 1) above this error fraction (default 0)
+      "targets": [
+        {"url": "http://localhost:{port}/", "weight": 3},
+        {"url": "http://localhost:{port2}/api/jobs", "method": "POST",
+         "headers": {"Content-Type": "application/json"}, "body": {"title": "Designer"}}
+      ]
+    }
+
+Responses with status >= 400, timeouts and connection errors count as
+errors. Uses only the standard library (HTTP/1.1, no pipelining).
+
+Usage:
+    python scripts/load_generator.py scenario.json
+    python scripts/load_generator.py scenario.json --output results.json
+    # or let with_server.py start the servers first:
+    python scripts/with_server.py --server "npm start" --port 3000 --load scenario.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import ssl
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+# Numeric scenario settings: (type, smallest allowed value)
+SCENARIO_NUMBERS = {
+    'concurrency': (int, 1),
+    'duration': (float, 0),
+    'count': (int, 1),
+    'timeout': (float, 0),
+    'max_error_rate': (float, 0),
+}
+
+
+def load_scenario(path, expand=None):
+    """Read and validate a scenario file, substituting placeholders in URLs with `expand` if given."""
+    scenario = json.loads(Path(path).read_text(encoding='utf-8'))
+    if not isinstance(scenario, dict):
+        raise ValueError(f"{path}: scenario must be a JSON object")
+    for key, (kind, minimum) in SCENARIO_NUMBERS.items():
+        if key not in scenario:
+            continue
+        try:
+            scenario[key] = kind(scenario[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}: {key} must be a number, got {scenario[key]!r}") from None
+        if scenario[key] < minimum:
+            raise ValueError(f"{path}: {key} must be at least {minimum}, got {scenario[key]}")
+    targets = scenario.get('targets') or []
+    if not isinstance(targets, list):
+        raise ValueError(f"{path}: targets must be a list")
+    if not targets:
+        raise ValueError(f"{path}: scenario has no targets")
+    for target in targets:
+        if not isinstance(target, dict) or 'url' not in target:
+            raise ValueError(f"{path}: every target needs a url")
+        try:
+            target['weight'] = int(target.get('weight', 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}: target weight must be a number, got {target['weight']!r}") from None
+        if target['weight'] < 1:
+            raise ValueError(f"{path}: target weight must be at least 1 ({target['url']})")
+        if expand is not None:
+            target['url'] = expand(target['url'])
+        parts = urlsplit(target['url'])
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"{path}: unsupported url {target['url']!r}")
+        try:
+            port = parts.port
+        except ValueError:
+            raise ValueError(f"{path}: bad port in url {target['url']!r}") from None
+        target['address'] = (parts.scheme, parts.hostname, port or (443 if parts.scheme == 'https' else 80))
+        target['path'] = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        target['method'] = target.get('method', 'GET').upper()
+        body = target.get('body')
+        if isinstance(body, (dict, list)):
+            target['body'] = json.dumps(body).encode()
+            target.setdefault('headers', {}).setdefault('Content-Type', 'application/json')
+        elif isinstance(body, str):
+            target['body'] = body.encode()
+    if 'duration' not in scenario and 'count' not in scenario:
+        scenario['duration'] = 10
+    return scenario
+
+
+class Connection:
+    """One HTTP/1.1 connection to a host, reopened after errors or Connection: close."""
+
+    def __init__(self, scheme, host, port):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        context = ssl.create_default_context() if self.scheme == 'https' else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body, keep_alive):
+        """Send one request and read the whole response. Returns the status code."""
+        if self.writer is None:
+            await self.open()
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        version, status = status_line.split(None, 2)[:2]
+        status = int(status)
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        reusable = keep_alive and version == b'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            pass
+        elif 'chunked' in response_headers.get('transfer-encoding', '').lower():
+            await self._read_chunked()
+        elif 'content-length' in response_headers:
+            await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            # Body runs until the server closes the connection
+            await self.reader.read()
+            reusable = False
+        if not reusable:
+            self.close()
+        return status
+
+    async def _read_chunked(self):
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Trailers end with a blank line
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            await self.reader.readexactly(size + 2)
+
+
+async def run_scenario(scenario):
+    """Drive the scenario's targets and return the raw samples: (target index, seconds, status or error)."""
+    targets = scenario['targets']
+    concurrency = int(scenario.get('concurrency', 10))
+    keep_alive = scenario.get('keep_alive', True)
+    timeout = float(scenario.get('timeout', 10))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + float(scenario['duration']) if 'duration' in scenario else None
+    remaining = [int(scenario['count'])] if 'count' in scenario else None
+
+    # Weighted round-robin over targets, shared by all workers
+    order = itertools.cycle([i for i, target in enumerate(targets) for _ in range(target['weight'])])
+    samples = []
+
+    async def worker():
+        connections = {}
+        try:
+            while True:
+                if deadline is not None and loop.time() >= deadline:
+                    return
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                index = next(order)
+                target = targets[index]
+                connection = connections.get(target['address'])
+                if connection is None:
+                    connection = connections[target['address']] = Connection(*target['address'])
+                start = time.perf_counter()
+                try:
+                    outcome = await asyncio.wait_for(
+                        connection.request(target['method'], target['path'], target.get('headers', {}),
+                                           target.get('body'), keep_alive), timeout)
+                except asyncio.TimeoutError:
+                    connection.close()
+                    outcome = 'timeout'
+                except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                    connection.close()
+                    outcome = type(e).__name__
+                samples.append((index, time.perf_counter() - start, outcome))
+        finally:
+            for connection in connections.values():
+                connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    summary = {f"p{p}": round(percentile(ordered, p) * 1000, 3) if ordered else None for p in (50, 95, 99)}
+    summary['max'] = round(ordered[-1] * 1000, 3) if ordered else None
+    return summary
+
+
+def summarize(scenario, samples, elapsed):
+    """Throughput, error counts and latency percentiles/histogram for a run."""
+    errors = {}
+    for _, _, outcome in samples:
+        if not (isinstance(outcome, int) and outcome < 400):
+            errors[str(outcome)] = errors.get(str(outcome), 0) + 1
+    error_count = sum(errors.values())
+
+    histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for _, seconds, _ in samples:
+        ms = seconds * 1000
+        histogram[next((i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if ms < bound), len(HISTOGRAM_BOUNDS_MS))] += 1
+
+    per_target = []
+    for i, target in enumerate(scenario['targets']):
+        target_samples = [s for s in samples if s[0] == i]
+        per_target.append({
+            'method': target['method'],
+            'url': target['url'],
+            'requests': len(target_samples),
+            'errors': sum(1 for _, _, o in target_samples if not (isinstance(o, int) and o < 400)),
+            'latency_ms': latency_summary([s[1] for s in target_samples]),
+        })
+
+    return {
+        'requests': len(samples),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0,
+        'concurrency': int(scenario.get('concurrency', 10)),
+        'keep_alive': scenario.get('keep_alive', True),
+        'errors': error_count,
+        'error_rate': round(error_count / len(samples), 4) if samples else 0.0,
+        'errors_by_kind': errors,
+        'latency_ms': latency_summary([s[1] for s in samples]),
+        'histogram_ms': [
+            {'below': bound, 'count': count}
+            for bound, count in zip(HISTOGRAM_BOUNDS_MS + [None], histogram)
+        ],
+        'targets': per_target,
+    }
+
+
+def print_summary(summary, label=''):
+    latency = summary['latency_ms']
+    print(f"\n{label}Load test: {summary['requests']} requests in {summary['seconds']:.2f}s "
+          f"({summary['throughput_rps']:.1f} req/s), concurrency {summary['concurrency']}, "
+          f"keep-alive {'on' if summary['keep_alive'] else 'off'}")
+    kinds = ', '.join(f"{kind} x{count}" for kind, count in sorted(summary['errors_by_kind'].items()))
+    print(f"{label}  errors: {summary['errors']} ({summary['error_rate'] * 100:.2f}%){': ' + kinds if kinds else ''}")
+    if latency['p50'] is not None:
+        print(f"{label}  latency ms: p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  "
+              f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    peak = max((bucket['count'] for bucket in summary['histogram_ms']), default=0)
+    for bucket in summary['histogram_ms']:
+        if not bucket['count']:
+            continue
+        name = f"< {bucket['below']} ms" if bucket['below'] is not None else f">= {HISTOGRAM_BOUNDS_MS[-1]} ms"
+        bar = '#' * max(1, round(bucket['count'] / peak * 40))
+        print(f"{label}  {name:>11} {bar} {bucket['count']}")
+    if len(summary['targets']) > 1:
+        for target in summary['targets']:
+            p50 = target['latency_ms']['p50']
+            p50 = f"p50 {p50:.2f} ms" if p50 is not None else 'no samples'
+            print(f"{label}  {target['method']} {target['url']}: {target['requests']} req, "
+                  f"{target['errors']} errors, {p50}")
+
+
+def run_load(scenario, output=None, label=''):
+    """Run a loaded scenario, print the summary and return (summary, passed)."""
+    samples, elapsed = asyncio.run(run_scenario(scenario))
+    summary = summarize(scenario, samples, elapsed)
+    print_summary(summary, label)
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(json.dumps(summary, indent=2))
+        print(f"{label}Load results: {output}")
+    return summary, summary['error_rate'] <= float(scenario.get('max_error_rate', 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run an HTTP load scenario against running servers')
+    parser.add_argument('scenario', help='Scenario JSON file')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    try:
+        scenario = load_scenario(args.scenario)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read scenario: {e}")
+        sys.exit(1)
+    _, passed = run_load(scenario, args.output)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
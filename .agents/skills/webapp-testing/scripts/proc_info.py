@@ -0,0 +1,143 @@
+"""
+Process and socket lookups from /proc (Linux).
+
+Every function returns None where /proc is not available, so callers can
+skip checks on other platforms instead of failing.
+"""
+
+import os
+from pathlib import Path
+
+PROC = Path('/proc')
+TCP_LISTEN = '0A'
+
+
+def available():
+    return (PROC / 'net' / 'tcp').exists()
+
+
+def parent_pids():
+    """{pid: parent pid} for every visible process."""
+    parents = {}
+    for stat in PROC.glob('[0-9]*/stat'):
+        try:
+            text = stat.read_text()
+        except OSError:
+            continue
+        # The command name is in parentheses and may itself contain spaces or ')'
+        fields = text[text.rindex(')') + 2:].split()
+        parents[int(stat.parent.name)] = int(fields[1])
+    return parents
+
+
+def process_tree(pid):
+    """`pid` and all of its descendants."""
+    if not available():
+        return None
+    children = {}
+    for child, parent in parent_pids().items():
+        children.setdefault(parent, []).append(child)
+    tree, stack = set(), [pid]
+    while stack:
+        current = stack.pop()
+        if current not in tree:
+            tree.add(current)
+            stack.extend(children.get(current, []))
+    return tree
+
+
+def listening_inodes(port):
+    """Socket inodes listening on TCP `port` (IPv4 or IPv6)."""
+    inodes = set()
+    for table in ('tcp', 'tcp6'):
+        try:
+            lines = (PROC / 'net' / table).read_text().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if fields[3] == TCP_LISTEN and int(fields[1].rsplit(':', 1)[1], 16) == port:
+                inodes.add(fields[9])
+    return inodes
+
+
+def listening_pids(port):
+    """Processes holding a socket that listens on TCP `port`."""
+    if not available():
+        return None
+    targets = {f"socket:[{inode}]" for inode in listening_inodes(port)}
+    pids = set()
+    if not targets:
+        return pids
+    for fd_dir in PROC.glob('[0-9]*/fd'):
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(fd_dir / fd) in targets:
+                    pids.add(int(fd_dir.parent.name))
+                    break
+            except OSError:
+                continue
+    return pids
+
+
+def command_line(pid):
+    try:
+        raw = (PROC / str(pid) / 'cmdline').read_bytes()
+    except OSError:
+        return '?'
+    return raw.replace(b'\0', b' ').decode(errors='replace').strip() or '?'
+
+
+def is_running(pid):
+    """Whether `pid` exists and is not a zombie waiting to be reaped."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        stat = (PROC / str(pid) / 'stat').read_text()
+    except OSError:
+        return True
+    return stat[stat.rindex(')') + 2] != 'Z'
+
+
+def process_usage(pid):
+    """{cpu_seconds, rss_bytes, threads, fds} of one process, or None once it has gone."""
+    try:
+        stat = (PROC / str(pid) / 'stat').read_text()
+    except OSError:
+        return None
+    # Fields after the command name start at field 3 (state) of proc(5)
+    fields = stat[stat.rindex(')') + 2:].split()
+    try:
+        fds = len(os.listdir(PROC / str(pid) / 'fd'))
+    except OSError:
+        fds = 0
+    return {
+        'cpu_seconds': (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'),
+        'rss_bytes': int(fields[21]) * os.sysconf('SC_PAGE_SIZE'),
+        'threads': int(fields[17]),
+        'fds': fds,
+    }
+
+
+def tree_usage(pid):
+    """process_usage summed over `pid` and its descendants, plus the process count."""
+    tree = process_tree(pid)
+    if tree is None:
+        return None
+    total = {'cpu_seconds': 0.0, 'rss_bytes': 0, 'threads': 0, 'fds': 0, 'processes': 0}
+    for member in tree:
+        usage = process_usage(member)
+        if usage is None:
+            continue
+        for key, value in usage.items():
+            total[key] += value
+        total['processes'] += 1
+    return total if total['processes'] else None
@@ -0,0 +1,98 @@
+"""
+Resource usage sampling for servers under test.
+
+A background thread reads each server's whole process tree from /proc
+every interval: CPU time, RSS, threads and open file descriptors. The
+time series and a peak/mean summary per server are written as JSON.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import proc_info
+
+# Sampled metrics summarized as peak and mean
+SUMMARY_METRICS = ('cpu_percent', 'rss_bytes', 'threads', 'fds', 'processes')
+
+
+class ResourceSampler:
+    """Samples servers that have a 'pid' (set once each is launched)."""
+
+    def __init__(self, servers, interval=0.5):
+        self.servers = servers
+        self.interval = interval
+        self.series = [[] for _ in servers]
+        self.origin = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Take a last sample and stop (call before the servers are stopped)."""
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        now = time.monotonic() - self.origin
+        for server, series in zip(self.servers, self.series):
+            pid = server.get('pid')
+            usage = proc_info.tree_usage(pid) if pid is not None else None
+            if usage is None:
+                continue
+            if series:
+                previous = series[-1]
+                elapsed = now - previous['t']
+                cpu = usage['cpu_seconds'] - previous['cpu_seconds']
+                usage['cpu_percent'] = round(max(0.0, cpu) / elapsed * 100, 1) if elapsed > 0 else 0.0
+            else:
+                usage['cpu_percent'] = 0.0
+            usage['t'] = round(now, 3)
+            usage['cpu_seconds'] = round(usage['cpu_seconds'], 3)
+            series.append(usage)
+
+    def report(self):
+        servers = []
+        for i, (server, series) in enumerate(zip(self.servers, self.series), 1):
+            summary = {'samples': len(series)}
+            if series:
+                summary['duration_seconds'] = round(series[-1]['t'] - series[0]['t'], 3)
+                # CPU used by processes alive at each end; exited children's time is not counted
+                summary['cpu_seconds'] = round(series[-1]['cpu_seconds'] - series[0]['cpu_seconds'], 3)
+                summary['rss_growth_bytes'] = series[-1]['rss_bytes'] - series[0]['rss_bytes']
+                for metric in SUMMARY_METRICS:
+                    values = [sample[metric] for sample in series]
+                    summary[f"{metric}_peak"] = max(values)
+                    summary[f"{metric}_mean"] = round(sum(values) / len(values), 1)
+            servers.append({'server': i, 'cmd': server['cmd'], 'port': server['port'],
+                            'summary': summary, 'samples': series})
+        return {'interval_seconds': self.interval, 'servers': servers}
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = self.report()
+        path.write_text(json.dumps(report, indent=2))
+        return report
+
+
+def print_summary(report, label=''):
+    print(f"\n{label}Resource usage:")
+    for server in report['servers']:
+        s = server['summary']
+        if not s['samples']:
+            print(f"{label}  [{server['server']}] port {server['port']}: no samples")
+            continue
+        print(f"{label}  [{server['server']}] port {server['port']}: "
+              f"cpu {s['cpu_seconds']:.2f}s (peak {s['cpu_percent_peak']:.0f}%), "
+              f"rss peak {s['rss_bytes_peak'] / 2**20:.1f} MiB (growth {s['rss_growth_bytes'] / 2**20:+.1f} MiB), "
+              f"threads peak {s['threads_peak']}, fds peak {s['fds_peak']}")
@@ -0,0 +1,118 @@
+"""
+Startup and run timing for with_server.py --report.
+
+Each run is one record. Event times are seconds since the run started:
+per server its spawn, first line of output, port open, each readiness
+probe passing, ready and exit on shutdown; per run the test start and end
+and the shutdown. Durations derived from them are summarized as
+min/median/max over all runs (see --repeat).
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+# Durations summarized across runs
+RUN_DURATIONS = ('startup_seconds', 'test_seconds', 'shutdown_seconds', 'total_seconds')
+SERVER_DURATIONS = ('first_output_seconds', 'port_open_seconds', 'boot_seconds', 'stop_seconds')
+
+
+def since(origin, t):
+    return round(t - origin, 4) if t is not None else None
+
+
+def elapsed(start, end):
+    return round(end - start, 4) if start is not None and end is not None else None
+
+
+def server_timing(number, server, origin, shutdown_start):
+    """Timing record for one server; 'launched' and 'ready' are already relative to `origin`."""
+    marks = server.get('marks', {})
+    spawn = server.get('launched')
+    ready = server.get('ready')
+    first_output = since(origin, server['log'].first_output)
+    port_open = since(origin, marks.get('port_open'))
+    stopped = since(origin, marks.get('stopped'))
+    return {
+        'server': number,
+        'cmd': server['cmd'],
+        'port': server['port'],
+        'reused': bool(server.get('reused')),
+        'spawn': None if spawn is None else round(spawn, 4),
+        'first_output': first_output,
+        'port_open': port_open,
+        'probes': {name: since(origin, t) for name, t in marks.get('probes', {}).items()},
+        'ready': None if ready is None else round(ready, 4),
+        'stopped': stopped,
+        'first_output_seconds': elapsed(spawn, first_output),
+        'port_open_seconds': elapsed(spawn, port_open),
+        'boot_seconds': elapsed(spawn, ready),
+        'stop_seconds': elapsed(since(origin, shutdown_start), stopped),
+    }
+
+
+def run_record(servers, origin, marks, started_at, code, error=None, **extra):
+    """
+    Timing record for one run. `marks` holds monotonic times for 'ready',
+    'test_start', 'test_end', 'shutdown_start' and 'shutdown_end' (any may be missing).
+    """
+    return {
+        **extra,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(started_at)),
+        'code': code,
+        'error': error,
+        'ready': since(origin, marks.get('ready')),
+        'test_start': since(origin, marks.get('test_start')),
+        'test_end': since(origin, marks.get('test_end')),
+        'shutdown_start': since(origin, marks.get('shutdown_start')),
+        'shutdown_end': since(origin, marks.get('shutdown_end')),
+        'startup_seconds': since(origin, marks.get('ready')),
+        'test_seconds': elapsed(marks.get('test_start'), marks.get('test_end')),
+        'shutdown_seconds': elapsed(marks.get('shutdown_start'), marks.get('shutdown_end')),
+        'total_seconds': since(origin, marks.get('shutdown_end')),
+        'servers': [server_timing(i, server, origin, marks.get('shutdown_start'))
+                    for i, server in enumerate(servers, 1)],
+    }
+
+
+def spread(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {'min': min(values), 'median': round(statistics.median(values), 4), 'max': max(values),
+            'count': len(values)}
+
+
+def summarize(records):
+    """min/median/max of every duration over `records`, per run and per server."""
+    summary = {key: spread(record[key] for record in records) for key in RUN_DURATIONS}
+    servers = max((len(record['servers']) for record in records), default=0)
+    summary['servers'] = [
+        {'server': i + 1, **{key: spread(record['servers'][i][key] for record in records if i < len(record['servers']))
+                             for key in SERVER_DURATIONS}}
+        for i in range(servers)
+    ]
+    return summary
+
+
+def write_report(path, records, argv):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {'argv': argv, 'runs': records, 'summary': summarize(records)}
+    path.write_text(json.dumps(report, indent=2))
+    return report
+
+
+def print_summary(summary, title):
+    def row(name, stats):
+        if stats is not None:
+            print(f"  {name:<22} {stats['min']:8.3f} {stats['median']:8.3f} {stats['max']:8.3f}")
+
+    print(f"\nTiming over {title} (seconds):")
+    print(f"  {'':<22} {'min':>8} {'median':>8} {'max':>8}")
+    for key in RUN_DURATIONS:
+        row(key.replace('_seconds', ''), summary[key])
+    for server in summary['servers']:
+        for key in SERVER_DURATIONS:
+            row(f"server {server['server']} {key.replace('_seconds', '')}", server[key])
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Keep servers started by with_server.py --reuse running between runs.
+
+Each warm server is keyed by (command, port, working directory). A small
+supervisor process owns the server and stops it once no run has used it
+for the idle timeout. A state file records the supervisor, and a lock
+file makes start-or-attach atomic so concurrent runs share one instance.
+
+Usage:
+    python scripts/warm_servers.py list
+    python scripts/warm_servers.py stop            # stop every warm server
+    python scripts/warm_servers.py stop KEY ...
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STATE_DIR = Path(os.environ.get('WITH_SERVER_STATE_DIR', Path(tempfile.gettempdir()) / f"with_server-{os.getuid()}"))
+# How often the supervisor checks whether its server is idle or has exited
+CHECK_INTERVAL = 1.0
+
+
+def server_key(cmd, port, cwd):
+    return hashlib.sha256(json.dumps([cmd, port, cwd]).encode()).hexdigest()[:16]
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_json(path, data):
+    """Write JSON atomically so readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class WarmServer:
+    """One reusable server instance and its files in STATE_DIR."""
+
+    def __init__(self, cmd, port, cwd=None):
+        self.cmd = cmd
+        self.port = port
+        self.cwd = cwd or os.getcwd()
+        self.key = server_key(cmd, port, self.cwd)
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self.state_path = STATE_DIR / f"{self.key}.json"
+        self.lock_path = STATE_DIR / f"{self.key}.lock"
+        self.log_path = STATE_DIR / f"{self.key}.log"
+        self.lease_path = STATE_DIR / f"{self.key}.lease.{os.getpid()}"
+        self._lock = None
+
+    def lock(self):
+        """Block until no other run is starting or attaching to this server."""
+        self._lock = open(self.lock_path, 'w')
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+
+    def unlock(self):
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def read_state(self):
+        """State of the running instance, or None if there is none."""
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if not pid_alive(state.get('supervisor_pid', 0)):
+            self.state_path.unlink(missing_ok=True)
+            return None
+        return state
+
+    def spawn(self, idle_timeout, env=None):
+        """Start a supervisor for a fresh instance (the server inherits `env`). Returns its Popen."""
+        config = {'cmd': self.cmd, 'port': self.port, 'cwd': self.cwd, 'log': str(self.log_path),
+                  'idle_timeout': idle_timeout}
+        self.log_path.write_bytes(b'')
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'supervise', str(self.state_path), json.dumps(config)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            start_new_session=True,
+        )
+        write_json(self.state_path, {**config, 'supervisor_pid': process.pid, 'started': time.time()})
+        return process
+
+    def stop(self, timeout=10):
+        """Ask the supervisor to stop the server and wait for it to go."""
+        state = self.read_state()
+        if state is None:
+            return
+        os.kill(state['supervisor_pid'], signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while pid_alive(state['supervisor_pid']) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.state_path.unlink(missing_ok=True)
+
+    def acquire_lease(self):
+        """Mark the server as in use by this run."""
+        self.lease_path.touch()
+
+    def release_lease(self):
+        """Stop using the server; its idle timer starts from now."""
+        self.lease_path.unlink(missing_ok=True)
+        try:
+            os.utime(self.state_path)
+        except FileNotFoundError:
+            pass
+
+
+def leased(key):
+    """Whether any live run holds a lease on server `key` (stale leases are removed)."""
+    busy = False
+    for lease in STATE_DIR.glob(f"{key}.lease.*"):
+        if pid_alive(int(lease.suffix[1:])):
+            busy = True
+        else:
+            lease.unlink(missing_ok=True)
+    return busy
+
+
+def stop_process_group(process, timeout=5):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def supervise(state_path, config):
+    """Run one warm server until it exits, goes idle or the supervisor is signalled."""
+    state_path = Path(state_path)
+    key = state_path.stem
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+
+    with open(config['log'], 'ab') as log:
+        process = subprocess.Popen(
+            config['cmd'],
+            shell=True,
+            cwd=config['cwd'],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    try:
+        while process.poll() is None and not stopping:
+            time.sleep(CHECK_INTERVAL)
+            if not state_path.exists():
+                break
+            with open(STATE_DIR / f"{key}.lock", 'w') as lock:
+                # A run holding the lock is attaching right now; check again later
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    idle = time.time() - state_path.stat().st_mtime
+                except FileNotFoundError:
+                    break
+                if not leased(key) and idle > config['idle_timeout']:
+                    state_path.unlink(missing_ok=True)
+                    break
+    finally:
+        stop_process_group(process)
+        try:
+            if json.loads(state_path.read_text()).get('supervisor_pid') == os.getpid():
+                state_path.unlink()
+        except (FileNotFoundError, ValueError):
+            pass
+
+
+def list_servers():
+    """State of every running warm server."""
+    servers = []
+    for path in sorted(STATE_DIR.glob('*.json')):
+        try:
+            state = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            continue
+        if pid_alive(state.get('supervisor_pid', 0)):
+            servers.append({'key': path.stem, 'idle': time.time() - path.stat().st_mtime,
+                            'in_use': leased(path.stem), **state})
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage warm servers kept by with_server.py --reuse')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    subparsers.add_parser('list', help='Show warm servers')
+    stop_parser = subparsers.add_parser('stop', help='Stop warm servers (all if no KEY is given)')
+    stop_parser.add_argument('keys', nargs='*', metavar='KEY')
+    supervise_parser = subparsers.add_parser('supervise', help=argparse.SUPPRESS)
+    supervise_parser.add_argument('state_path')
+    supervise_parser.add_argument('config')
+
+    args = parser.parse_args()
+
+    if args.action == 'supervise':
+        supervise(args.state_path, json.loads(args.config))
+        return
+
+    servers = list_servers()
+    if args.action == 'list':
+        if not servers:
+            print("No warm servers")
+        for server in servers:
+            status = 'in use' if server['in_use'] else f"idle {server['idle']:.0f}s/{server['idle_timeout']}s"
+            print(f"{server['key']}  port {server['port']}  {status}  {server['cmd']}  (cwd {server['cwd']}, log {server['log']})")
+        return
+
+    for server in servers:
+        if args.keys and server['key'] not in args.keys:
+            continue
+        WarmServer(server['cmd'], server['port'], server['cwd']).stop()
+        print(f"Stopped {server['key']} (port {server['port']}): {server['cmd']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,36 +7,873 @@ Usage:
     python scripts/with_server.py --server "npm run dev" --port 5173 -- python automation.py
     python scripts/with_server.py --server "npm start" --port 3000 -- python test.py
 
-    # Multiple servers
+    # Multiple servers (started concurrently)
     python scripts/with_server.py \
       --server "cd backend && python server.py" --port 3000 \
       --server "cd frontend && npm run dev" --port 5173 \
       -- python test.py
+
+    # Server 2 only starts once server 1 is ready
+    python scripts/with_server.py \
+      --server "cd backend && python server.py" --port 3000 \
+      --server "cd frontend && npm run dev" --port 5173 \
+      --after 2:1 -- python test.py
+
+    # Ready when /health answers 200 (server 1) and Vite logs "ready in" (server 2)
+    python scripts/with_server.py \
+      --server "cd backend && python server.py" --port 3000 \
+      --server "cd frontend && npm run dev" --port 5173 \
+      --ready 1:http:/health=200 --ready 2:log:"ready in" -- python test.py
+
+    # Keep the servers warm and reuse them on the next run
+    python scripts/with_server.py --reuse --server "npm run dev" --port 5173 -- python test.py
+
+    # Benchmark the started server with the built-in HTTP load generator
+    python scripts/with_server.py --server "npm start" --port 3000 --load scenario.json
+
+    # Let the OS pick a free port and pass it to the server
+    python scripts/with_server.py --server "npm run dev -- --port {port}" --port auto -- python test.py
+
+    # Time five full start/test/stop cycles and write the timings as JSON
+    python scripts/with_server.py --server "npm run dev" --port 5173 \
+      --repeat 5 --report timing.json -- python test.py
+
+    # Four isolated copies of the servers on free ports, one Playwright shard each
+    python scripts/with_server.py --shards 4 \
+      --server "npm run dev -- --port {port}" --port 5173 \
+      -- npx playwright test --shard={shard}/{shards}
+
+Server commands and the test command may use placeholders: {port} (the
+server's own port; the first server's port in the test command), {port1},
+{port2}, ... (each server's port), {shard} and {shards} (1-based shard
+number and shard count). The same values are exported as PORT, PORT_1,
+PORT_2, ..., SHARD_INDEX and SHARD_COUNT.
+
+With --sample FILE, each server's process tree is sampled from /proc
+(CPU, RSS, threads, open files) and the time series plus a peak/mean
+summary is written to FILE as JSON when the command finishes.
+
+With --report FILE, each run's timeline is written to FILE as JSON: per
+server when it was spawned, first wrote output, opened its port, passed
+each readiness probe and exited on shutdown, plus when the test started
+and ended. --repeat N runs the whole cycle N times (stopping at the first
+failure) and adds min/median/max of each duration.
+
+A fixed port that is already taken fails before the server starts, and
+on Linux the listener found once a server is ready must belong to the
+started process tree, so a stale server can't stand in for it.
+
+Server output is drained in the background into one log file per server
+(see --log-dir); the last --log-lines lines are printed if a server fails
+to start or the command exits non-zero.
 """
 
+import http.client
+import os
+import re
+import signal
 import subprocess
 import socket
+import tempfile
+import threading
 import time
 import sys
 import argparse
+from collections import deque
+from pathlib import Path
+
+import proc_info
+import load_generator
+import timing_report
+from resource_sampler import ResourceSampler, print_summary
+from warm_servers import WarmServer
+
+# Readiness polling starts fast and backs off, so quick servers are seen quickly
+POLL_INITIAL = 0.01
+POLL_MAX = 0.5
+
+
+def port_open(port):
+    try:
+        with socket.create_connection(('localhost', port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def http_ok(port, path='/', status=None):
+    """GET `path`; passes on `status` if given, otherwise on any non-error (< 400) status."""
+    conn = http.client.HTTPConnection('localhost', port, timeout=2)
+    try:
+        conn.request('GET', path)
+        code = conn.getresponse().status
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        conn.close()
+    return code == status if status is not None else code < 400
+
+
+def parse_probe(spec):
+    """
+    Parse a readiness probe: 'tcp', 'http[:PATH[=STATUS]]' or 'log:REGEX'.
+    """
+    kind, _, value = spec.partition(':')
+    if kind == 'tcp' and not value:
+        return {'kind': 'tcp'}
+    if kind == 'http':
+        path, _, status = (value or '/').partition('=')
+        if not path.startswith('/'):
+            raise ValueError(f"--ready {spec}: HTTP path must start with '/'")
+        try:
+            return {'kind': 'http', 'path': path, 'status': int(status) if status else None}
+        except ValueError:
+            raise ValueError(f"--ready {spec}: status must be a number")
+    if kind == 'log' and value:
+        try:
+            return {'kind': 'log', 'pattern': re.compile(value)}
+        except re.error as e:
+            raise ValueError(f"--ready {spec}: bad pattern: {e}")
+    raise ValueError(f"--ready expects tcp, http[:PATH[=STATUS]] or log:REGEX, got {spec!r}")
+
+
+def parse_probes(specs, count):
+    """
+    Parse --ready specs, each optionally prefixed with a 1-based server
+    number ('2:http:/health'); unprefixed probes apply to every server.
+
+    Returns the list of probes for each server (a TCP check if none given).
+    """
+    probes = [[] for _ in range(count)]
+    for spec in specs or []:
+        prefix, sep, rest = spec.partition(':')
+        if sep and prefix.isdigit():
+            server = int(prefix) - 1
+            if not 0 <= server < count:
+                raise ValueError(f"--ready {spec}: there is no server {server + 1}")
+            probes[server].append(parse_probe(rest))
+        else:
+            probe = parse_probe(spec)
+            for server_probes in probes:
+                server_probes.append(probe)
+    return [server_probes or [{'kind': 'tcp'}] for server_probes in probes]
+
+
+def describe_probe(probe):
+    if probe['kind'] == 'http':
+        return f"http {probe['path']}" + (f" = {probe['status']}" if probe['status'] is not None else '')
+    if probe['kind'] == 'log':
+        return f"log /{probe['pattern'].pattern}/"
+    return 'tcp'
+
+
+def port_in_use(port):
+    """Why `port` can't be used for a new server, or None if it is free."""
+    if not port_open(port):
+        return None
+    owners = proc_info.listening_pids(port)
+    who = ', '.join(f"pid {pid} ({proc_info.command_line(pid)})" for pid in sorted(owners)) if owners else 'another process'
+    return f"port {port} is already in use by {who}; stop it or use --port auto"
+
+
+def foreign_listener(port, root_pid):
+    """
+    Why the listener on `port` is not part of `root_pid`'s process tree, or
+    None if it is (or /proc can't tell, e.g. not on Linux).
+    """
+    owners = proc_info.listening_pids(port)
+    if not owners or owners & proc_info.process_tree(root_pid):
+        return None
+    others = ', '.join(f"pid {pid} ({proc_info.command_line(pid)})" for pid in sorted(owners))
+    return (f"is served by {others}, not by the started server "
+            "(use --no-port-check if it listens through another process, e.g. docker)")
 
-def is_server_ready(port, timeout=30):
-    """Wait for server to be ready by polling the port."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+
+def probe_passes(probe, port, log):
+    if probe['kind'] == 'tcp':
+        return port_open(port)
+    if probe['kind'] == 'http':
+        return http_ok(port, probe['path'], probe['status'])
+    return log.matched(probe['pattern'])
+
+
+def wait_until_ready(server, process, timeout, stop=None):
+    """
+    Wait until every probe of `server` passes.
+
+    Polls with exponential backoff, but wakes at once when a watched log
+    line appears or the server's output closes. Returns None when ready,
+    otherwise why not: the process exited, `stop` was set, or the timeout
+    ran out. Records when the port opened and each probe passed in
+    server['marks'].
+    """
+    log = server['log']
+    marks = server['marks']
+    tcp_probe = any(probe['kind'] == 'tcp' for probe in server['probes'])
+    deadline = time.monotonic() + timeout
+    delay = POLL_INITIAL
+    pending = list(server['probes'])
+    while True:
+        waiting = []
+        for probe in pending:
+            if probe_passes(probe, server['port'], log):
+                marks['probes'][describe_probe(probe)] = time.monotonic()
+            else:
+                waiting.append(probe)
+        pending = waiting
+        if 'port_open' not in marks:
+            if 'tcp' in marks['probes']:
+                marks['port_open'] = marks['probes']['tcp']
+            elif not tcp_probe and port_open(server['port']):
+                marks['port_open'] = time.monotonic()
+        if not pending:
+            return None
+        if process.poll() is not None:
+            return f"exited with code {process.returncode}"
+        if stop is not None and stop.is_set():
+            return 'cancelled'
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            waiting = ', '.join(describe_probe(probe) for probe in pending)
+            return f"not ready within {timeout}s (waiting for {waiting})"
+        log.changed.wait(min(delay, remaining))
+        log.changed.clear()
+        delay = min(delay * 2, POLL_MAX)
+
+
+class ServerLog:
+    """Drains a server's output into a log file, keeping the last lines in memory."""
+
+    def __init__(self, path, max_lines=50):
+        self.path = Path(path)
+        self.tail = deque(maxlen=max_lines)
+        self.lock = threading.Lock()
+        self.file = open(self.path, 'wb')
+        self.reader = None
+        # Set when a watched pattern first matches or the output closes
+        self.changed = threading.Event()
+        self.watched = {}
+        self.closing = threading.Event()
+        # time.monotonic() of the first line of output
+        self.first_output = None
+
+    def attach(self, stream):
+        """Start reading `stream` on a background thread so the server never blocks on a full pipe."""
+        self.reader = threading.Thread(target=self._drain, args=(stream,), daemon=True)
+        self.reader.start()
+
+    def follow(self, path, from_end=False):
+        """Tail a log file written by another process (a warm server's supervisor)."""
+        self.reader = threading.Thread(target=self._follow, args=(path, from_end), daemon=True)
+        self.reader.start()
+
+    def watch(self, pattern):
+        """Remember whether any line matches `pattern` (call before attach)."""
+        self.watched.setdefault(pattern, False)
+
+    def matched(self, pattern):
+        with self.lock:
+            return self.watched.get(pattern, False)
+
+    def _record(self, line):
+        text = line.decode(errors='replace').rstrip('\r\n')
+        with self.lock:
+            if self.first_output is None:
+                self.first_output = time.monotonic()
+            self.file.write(line)
+            self.file.flush()
+            self.tail.append(text)
+            for pattern, seen in self.watched.items():
+                if not seen and pattern.search(text):
+                    self.watched[pattern] = True
+                    self.changed.set()
+
+    def _drain(self, stream):
+        for line in iter(stream.readline, b''):
+            self._record(line)
+        stream.close()
+        self.changed.set()
+
+    def _follow(self, path, from_end):
+        with open(path, 'rb') as f:
+            if from_end:
+                f.seek(0, os.SEEK_END)
+            partial = b''
+            while not self.closing.is_set():
+                partial += f.readline()
+                if partial.endswith(b'\n'):
+                    self._record(partial)
+                    partial = b''
+                else:
+                    self.closing.wait(0.05)
+
+    def dump(self, title):
+        """Print the buffered tail of the log."""
+        with self.lock:
+            lines = list(self.tail)
+        print(f"\n--- {title}: last {len(lines)} line(s) (full log: {self.path}) ---")
+        for line in lines:
+            print(f"  {line}")
+
+    def close(self, timeout=1):
+        self.closing.set()
+        # Orphaned children can keep the pipe open; don't wait on them forever
+        if self.reader is not None:
+            self.reader.join(timeout)
+        with self.lock:
+            self.file.close()
+
+
+PLACEHOLDER = re.compile(r'\{(port\d*|shard|shards)\}')
+
+
+def expand(text, values):
+    """Replace {port}, {port1}, {shard}, ... placeholders; other braces are left alone."""
+    return PLACEHOLDER.sub(lambda m: str(values.get(m.group(1), m.group(0))), text)
+
+
+def placeholder_values(ports, shard=1, shards=1):
+    values = {f"port{i}": port for i, port in enumerate(ports, 1)}
+    values.update(port=ports[0], shard=shard, shards=shards)
+    return values
+
+
+def command_env(ports, shard=1, shards=1):
+    """Environment for the test command: every server port plus the shard position."""
+    env = dict(os.environ, PORT=str(ports[0]), SHARD_INDEX=str(shard), SHARD_COUNT=str(shards))
+    env.update({f"PORT_{i}": str(port) for i, port in enumerate(ports, 1)})
+    return env
+
+
+def allocate_ports(count):
+    """
+    Pick `count` distinct free TCP ports. The sockets are held until all
+    ports are chosen so the OS can't hand out the same one twice.
+    """
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket()
+            sock.bind(('localhost', 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def build_servers(commands, ports, after, probes, log_dir, log_lines, shard=1, shards=1):
+    """Server records for one set of servers, with placeholders expanded and a log per server."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    values = placeholder_values(ports, shard, shards)
+    servers = []
+    for i, (cmd, port, deps, server_probes) in enumerate(zip(commands, ports, after, probes), 1):
+        log = ServerLog(log_dir / f"server-{i}-port-{port}.log", log_lines)
+        for probe in server_probes:
+            if probe['kind'] == 'log':
+                log.watch(probe['pattern'])
+        servers.append({
+            'cmd': expand(cmd, {**values, 'port': port}),
+            'env': dict(os.environ, PORT=str(port)),
+            'port': port,
+            'after': deps,
+            'probes': server_probes,
+            'log': log,
+            'marks': {'probes': {}},
+        })
+    return servers
+
+
+def parse_dependencies(specs, count):
+    """
+    Parse --after specs like '3:1,2' (server 3 starts after servers 1 and 2 are ready).
+
+    Returns a list with the set of 0-based dependencies of each server.
+    """
+    after = [set() for _ in range(count)]
+    for spec in specs or []:
         try:
-            with socket.create_connection(('localhost', port), timeout=1):
-                return True
-        except (socket.error, ConnectionRefusedError):
-            time.sleep(0.5)
-    return False
+            server, deps = spec.split(':', 1)
+            server = int(server) - 1
+            deps = {int(dep) - 1 for dep in deps.split(',') if dep.strip()}
+        except ValueError:
+            raise ValueError(f"--after expects SERVER:DEP[,DEP...] (1-based server numbers), got {spec!r}")
+        for i in {server} | deps:
+            if not 0 <= i < count:
+                raise ValueError(f"--after {spec}: there is no server {i + 1}")
+        if server in deps:
+            raise ValueError(f"--after {spec}: a server cannot wait for itself")
+        after[server] |= deps
+
+    # Reject cycles, which would wait forever
+    done = set()
+    while len(done) < count:
+        runnable = [i for i in range(count) if i not in done and after[i] <= done]
+        if not runnable:
+            stuck = ', '.join(str(i + 1) for i in range(count) if i not in done)
+            raise ValueError(f"--after dependencies form a cycle between servers {stuck}")
+        done.update(runnable)
+    return after
+
+
+def start_warm_server(server, timeout, idle_timeout, stop=None, check_ports=True):
+    """
+    Attach to a healthy warm instance of `server`, or start a new one.
+
+    Returns None when the server is ready, otherwise why it is not.
+    """
+    warm = WarmServer(server['cmd'], server['port'])
+    server['warm'] = warm
+    warm.lock()
+    try:
+        # Log probes matched when the instance first started; only live checks can be repeated
+        live_probes = [probe for probe in server['probes'] if probe['kind'] != 'log']
+        state = warm.read_state()
+        if (state is not None and all(probe_passes(p, server['port'], server['log']) for p in live_probes)
+                and not (check_ports and foreign_listener(server['port'], state['supervisor_pid']))):
+            server['log'].follow(warm.log_path, from_end=True)
+            server['reused'] = True
+            server['pid'] = state['supervisor_pid']
+            warm.acquire_lease()
+            return None
+
+        # Missing, or running but unhealthy: start afresh
+        warm.stop()
+        problem = port_in_use(server['port']) if check_ports else None
+        if problem is not None:
+            return problem
+        process = warm.spawn(idle_timeout, server['env'])
+        server['pid'] = process.pid
+        server['log'].follow(warm.log_path)
+        problem = wait_until_ready(server, process, timeout, stop)
+        if problem is None and check_ports:
+            problem = foreign_listener(server['port'], process.pid)
+        if problem is None:
+            warm.acquire_lease()
+        else:
+            warm.stop()
+        return problem
+    finally:
+        warm.unlock()
+
+
+def start_servers(servers, timeout, server_processes, reuse=False, idle_timeout=600, label='', check_ports=True,
+                  origin=None):
+    """
+    Launch every server concurrently, each as soon as the servers it depends
+    on are ready, and wait for all of them in parallel.
+
+    With `reuse`, servers are kept warm between runs (see warm_servers.py).
+    Progress lines are prefixed with `label` (used to tell shards apart).
+    With `check_ports`, busy ports and listeners outside the started
+    process tree count as failures.
+    Fills in each server's 'launched' and 'ready' times (seconds since the
+    monotonic `origin`, by default the first launch). Raises RuntimeError
+    if any server fails to come up.
+    """
+    origin = time.monotonic() if origin is None else origin
+    ready = [threading.Event() for _ in servers]
+    failed = threading.Event()
+    errors = []
+
+    def run(i):
+        server = servers[i]
+        try:
+            for dep in sorted(server['after']):
+                while not ready[dep].wait(0.05):
+                    if failed.is_set():
+                        return
+
+            print(f"{label}Starting server {i+1}/{len(servers)}: {server['cmd']}")
+            server['launched'] = time.monotonic() - origin
+            probes = ', '.join(describe_probe(probe) for probe in server['probes'])
+            if reuse:
+                print(f"{label}Looking for a warm server on port {server['port']} ({probes})...")
+                problem = start_warm_server(server, timeout, idle_timeout, stop=failed, check_ports=check_ports)
+            else:
+                problem = port_in_use(server['port']) if check_ports else None
+                if problem is None:
+                    # Use shell=True to support commands with cd and &&; a new session makes
+                    # the server and everything it spawns one process group to stop together
+                    process = subprocess.Popen(
+                        server['cmd'],
+                        shell=True,
+                        env=server['env'],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        start_new_session=True
+                    )
+                    server_processes.append(process)
+                    server['pid'] = process.pid
+                    server['log'].attach(process.stdout)
+
+                    print(f"{label}Waiting for server on port {server['port']} ({probes})...")
+                    problem = wait_until_ready(server, process, timeout, stop=failed)
+                    if problem is None and check_ports:
+                        problem = foreign_listener(server['port'], process.pid)
+            if problem is not None:
+                if not failed.is_set():
+                    errors.append(f"Server {i+1} on port {server['port']}: {problem}")
+                failed.set()
+                return
+
+            server['ready'] = time.monotonic() - origin
+            print(f"{label}Server ready on port {server['port']}{' (reused warm server)' if server.get('reused') else ''}")
+            ready[i].set()
+        except Exception as e:
+            errors.append(f"Server {i+1} could not be started: {e}")
+            failed.set()
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(len(servers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print_timeline(servers, label)
+    if errors:
+        for i, server in enumerate(servers):
+            if 'launched' in server and 'ready' not in server:
+                server['log'].dump(f"{label}server {i+1} ({server['cmd']})")
+        raise RuntimeError('; '.join(errors))
+
+
+def print_timeline(servers, label=''):
+    """Show when each server was launched and how long it took to become ready."""
+    print(f"\n{label}Startup timeline:")
+    for i, server in enumerate(servers):
+        launched = server.get('launched')
+        ready = server.get('ready')
+        if launched is None:
+            status = 'not started'
+        elif ready is None:
+            status = f"launched +{launched:.2f}s, not ready"
+        else:
+            status = f"launched +{launched:.2f}s, ready +{ready:.2f}s ({ready - launched:.2f}s)"
+            if server.get('reused'):
+                status += ', reused'
+        after = f" after {', '.join(str(d + 1) for d in sorted(server['after']))}" if server['after'] else ''
+        print(f"{label}  [{i+1}] port {server['port']}: {status}{after}")
+
+
+def signal_tree(process, pids, signum):
+    """Signal a server's process group, plus any descendants that left the group."""
+    try:
+        os.killpg(process.pid, signum)
+    except ProcessLookupError:
+        pass
+    for pid in pids:
+        try:
+            if os.getpgid(pid) != process.pid:
+                os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def stop_servers(server_processes, label='', timeout=5, stopped=None):
+    """
+    Stop every server's whole process tree at once: SIGTERM to all of them,
+    then SIGKILL whatever is still running when the shared `timeout` runs
+    out. Returns the (pid, command) of every process that had to be killed.
+    If given, `stopped` is filled with {pid: time.monotonic()} of when each
+    server's tree was gone.
+    """
+    stopped = {} if stopped is None else stopped
+    print(f"\n{label}Stopping {len(server_processes)} server(s)...")
+    start = time.monotonic()
+    trees = []
+    for process in server_processes:
+        # Snapshot the tree first: children are re-parented once the shell goes
+        pids = proc_info.process_tree(process.pid) or {process.pid}
+        commands = {pid: proc_info.command_line(pid) for pid in pids}
+        trees.append((process, commands))
+        signal_tree(process, pids, signal.SIGTERM)
+
+    def running(process, commands):
+        process.poll()
+        return [pid for pid in commands if proc_info.is_running(pid)]
+
+    deadline = start + timeout
+    while time.monotonic() < deadline:
+        for process, commands in trees:
+            if process.pid not in stopped and not running(process, commands):
+                stopped[process.pid] = time.monotonic()
+        if len(stopped) >= len(trees):
+            break
+        time.sleep(0.02)
+
+    killed = []
+    for process, commands in trees:
+        survivors = running(process, commands)
+        if survivors:
+            signal_tree(process, survivors, signal.SIGKILL)
+            killed.extend((pid, commands[pid]) for pid in survivors)
+        process.wait()
+        stopped.setdefault(process.pid, time.monotonic())
+
+    print(f"{label}Stopped {len(server_processes)} server(s) in {time.monotonic() - start:.2f}s")
+    if killed:
+        print(f"{label}Killed after {timeout:g}s without exiting on SIGTERM:")
+        for pid, command in killed:
+            print(f"{label}  pid {pid}: {command}")
+    return killed
+
+
+def run_prefixed(command, env, label):
+    """Run a command, prefixing each line of its output with `label`. Returns the exit code."""
+    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    for line in iter(process.stdout.readline, b''):
+        sys.stdout.write(f"{label}{line.decode(errors='replace')}")
+        sys.stdout.flush()
+    process.stdout.close()
+    return process.wait()
+
+
+def numbered(path, tags):
+    """`path` with tags such as 'run2' or 'shard1' inserted before its suffix (results.run2.shard1.json)."""
+    if not path or not tags:
+        return path
+    path = Path(path)
+    return path.with_name('.'.join([path.stem, *tags]) + path.suffix)
+
+
+def record_stops(servers, stopped):
+    for server in servers:
+        if server.get('pid') in stopped:
+            server['marks']['stopped'] = stopped[server['pid']]
+
+
+def start_sampler(args, servers):
+    """Resource sampler for --sample, or None."""
+    if not args.sample:
+        return None
+    if not proc_info.available():
+        print("Note: --sample needs /proc (Linux); not sampling")
+        return None
+    return ResourceSampler(servers, args.sample_interval).start()
+
+
+def finish_sampler(sampler, path, label=''):
+    if sampler is None:
+        return
+    sampler.stop()
+    print_summary(sampler.write(path), label)
+    print(f"{label}Resource samples: {path}")
+
+
+def run_tests(args, servers, ports, shard=1, shards=1, label='', tags=()):
+    """
+    Run the --load scenario and/or the test command against ready servers.
+    Returns the exit code (the load test counts as failed above its max_error_rate).
+    `tags` tell output files of repeated or sharded runs apart.
+    """
+    values = placeholder_values(ports, shard, shards)
+    code = 0
+    if args.load:
+        scenario = load_generator.load_scenario(args.load, lambda text: expand(text, values))
+        output = numbered(args.load_output, tags)
+        print(f"{label}Running load scenario: {args.load}")
+        _, passed = load_generator.run_load(scenario, output, label)
+        code = 0 if passed else 1
+
+    if args.command:
+        command = [expand(arg, values) for arg in args.command]
+        print(f"{label}Running: {' '.join(command)}\n")
+        if shards > 1:
+            command_code = run_prefixed(command, command_env(ports, shard, shards), label)
+        else:
+            command_code = subprocess.run(command, env=command_env(ports)).returncode
+        code = code or command_code
+
+    if code != 0:
+        for i, server in enumerate(servers):
+            server['log'].dump(f"{label}server {i+1} ({server['cmd']})")
+    return code
+
+
+def run_shards(args, after, probes, log_dir, records, run=1, runs=1):
+    """
+    Run args.shards isolated copies of the server set on free ports, each
+    with its own shard of the test command, all at once. Appends a timing
+    record per shard to `records`. Returns the merged exit code: 0 if every
+    shard passed, else the first failing shard's code.
+    """
+    shards = args.shards
+    all_ports = allocate_ports(shards * len(args.servers))
+    results = [None] * shards
+    shard_records = [None] * shards
+    origin = time.monotonic()
+
+    def run_shard(shard):
+        label = f"[run {run}, shard {shard}] " if runs > 1 else f"[shard {shard}] "
+        tags = ([f"run{run}"] if runs > 1 else []) + [f"shard{shard}"]
+        ports = all_ports[(shard - 1) * len(args.servers):shard * len(args.servers)]
+        result = {'shard': shard, 'ports': ports, 'code': 1, 'startup': None, 'test': None, 'error': None}
+        results[shard - 1] = result
+        servers = build_servers(args.servers, ports, after, probes, log_dir / f"shard-{shard}",
+                                args.log_lines, shard, shards)
+        server_processes = []
+        sampler = start_sampler(args, servers)
+        started_at, start = time.time(), time.monotonic()
+        marks, stopped = {}, {}
+        try:
+            start_servers(servers, args.timeout, server_processes, label=label, check_ports=not args.no_port_check,
+                          origin=start)
+            marks['ready'] = time.monotonic()
+            result['startup'] = marks['ready'] - start
+
+            marks['test_start'] = time.monotonic()
+            result['code'] = run_tests(args, servers, ports, shard, shards, label, tags)
+            marks['test_end'] = time.monotonic()
+            result['test'] = marks['test_end'] - marks['test_start']
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+        finally:
+            if sampler is not None:
+                finish_sampler(sampler, numbered(args.sample, tags), label)
+            marks['shutdown_start'] = time.monotonic()
+            stop_servers(server_processes, label, args.shutdown_timeout, stopped)
+            marks['shutdown_end'] = time.monotonic()
+            record_stops(servers, stopped)
+            for server in servers:
+                server['log'].close()
+            shard_records[shard - 1] = timing_report.run_record(
+                servers, start, marks, started_at, result['code'], result['error'], run=run, shard=shard)
+
+    threads = [threading.Thread(target=run_shard, args=(shard,)) for shard in range(1, shards + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"\nShard summary ({shards} shards, {time.monotonic() - origin:.2f}s total):")
+    for r in results:
+        ports = ','.join(str(port) for port in r['ports'])
+        if r['error'] is not None:
+            print(f"  [FAIL] shard {r['shard']}  ports {ports}  servers failed: {r['error']}")
+            continue
+        status = '[ok]  ' if r['code'] == 0 else '[FAIL]'
+        print(f"  {status} shard {r['shard']}  ports {ports}  startup {r['startup']:.2f}s  "
+              f"test {r['test']:.2f}s  exit {r['code']}")
+    records.extend(shard_records)
+    failed = [r for r in results if r['code'] != 0]
+    print(f"{shards - len(failed)} passed, {len(failed)} failed")
+    return failed[0]['code'] if failed else 0
+
+
+def run_once(args, after, probes, log_dir, records, run=1, runs=1):
+    """
+    Start the servers, run the load test and/or command, then stop them.
+    Appends the run's timing record to `records`. Returns the exit code.
+    """
+    label = f"[run {run}] " if runs > 1 else ''
+    tags = [f"run{run}"] if runs > 1 else []
+    ports = resolve_ports(args.ports)
+    servers = build_servers(args.servers, ports, after, probes, log_dir, args.log_lines)
+
+    server_processes = []
+    sampler = start_sampler(args, servers)
+    started_at, origin = time.time(), time.monotonic()
+    marks, stopped = {}, {}
+    code, error = 1, None
+
+    try:
+        # Start all servers, in parallel where --after allows
+        start_servers(servers, args.timeout, server_processes, args.reuse, args.idle_timeout, label,
+                      check_ports=not args.no_port_check, origin=origin)
+        marks['ready'] = time.monotonic()
+
+        print(f"\n{label}All {len(servers)} server(s) ready")
+
+        # Run the load test and/or the command
+        marks['test_start'] = time.monotonic()
+        code = run_tests(args, servers, ports, label=label, tags=tags)
+        marks['test_end'] = time.monotonic()
+        return code
+
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        raise
+
+    finally:
+        finish_sampler(sampler, numbered(args.sample, tags), label)
+        # Clean up all servers
+        marks['shutdown_start'] = time.monotonic()
+        stop_servers(server_processes, label, args.shutdown_timeout, stopped)
+        marks['shutdown_end'] = time.monotonic()
+        record_stops(servers, stopped)
+        for server in servers:
+            if 'warm' in server:
+                server['warm'].release_lease()
+            server['log'].close()
+        records.append(timing_report.run_record(servers, origin, marks, started_at, code, error, run=run))
+        if args.reuse:
+            print(f"{label}Warm servers stay up until idle for {args.idle_timeout:g}s "
+                  "(python scripts/warm_servers.py stop to stop them now)")
+        else:
+            print(f"{label}All servers stopped")
+
+
+def port_option(value):
+    if value == 'auto':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a port number or 'auto', got {value!r}")
+
+
+def resolve_ports(ports):
+    """Replace 'auto' (None) entries with free ports."""
+    free = iter(allocate_ports(ports.count(None)))
+    return [port if port is not None else next(free) for port in ports]
 
 
 def main():
     parser = argparse.ArgumentParser(description='Run command with one or more servers')
     parser.add_argument('--server', action='append', dest='servers', required=True, help='Server command (can be repeated)')
-    parser.add_argument('--port', action='append', dest='ports', type=int, required=True, help='Port for each server (must match --server count)')
+    parser.add_argument('--port', action='append', dest='ports', type=port_option, required=True,
+                        help="Port for each server (must match --server count); 'auto' picks a free port, "
+                             "passed to the server as {port} / $PORT")
     parser.add_argument('--timeout', type=int, default=30, help='Timeout in seconds per server (default: 30)')
+    parser.add_argument('--shutdown-timeout', type=float, default=5,
+                        help='Seconds all servers get to exit after SIGTERM before being killed (default: 5)')
+    parser.add_argument('--after', action='append', metavar='SERVER:DEP[,DEP]',
+                        help='Start server SERVER only after servers DEP are ready, by 1-based position '
+                             '(e.g. 2:1; can be repeated). Servers without --after start immediately.')
+    parser.add_argument('--ready', action='append', metavar='[SERVER:]PROBE',
+                        help='Readiness probe: tcp (default), http[:PATH[=STATUS]] or log:REGEX. '
+                             'Prefix a 1-based server number to target one server (e.g. 2:log:"ready in"); '
+                             'all probes of a server must pass. Can be repeated.')
+    parser.add_argument('--reuse', action='store_true',
+                        help='Keep servers running after the command and reuse healthy ones on later runs '
+                             '(matched by command, port and working directory)')
+    parser.add_argument('--idle-timeout', type=float, default=600,
+                        help='With --reuse, stop a warm server after this many seconds unused (default: 600)')
+    parser.add_argument('--no-port-check', action='store_true',
+                        help="Don't check that ports are free before starting, or that the listener belongs "
+                             "to the started server (needed when e.g. docker-proxy holds the port)")
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Run N isolated copies of the servers on free ports and N copies of the command '
+                             'concurrently (use {port}/{shard}/{shards} placeholders or the PORT/SHARD_INDEX '
+                             'environment variables to tell them apart)')
+    parser.add_argument('--sample', metavar='FILE',
+                        help='Sample CPU, RSS, threads and open files of each server process tree and write '
+                             'the time series and summary to FILE as JSON (Linux)')
+    parser.add_argument('--sample-interval', type=float, default=0.5,
+                        help='Seconds between resource samples (default: 0.5)')
+    parser.add_argument('--log-dir', help='Directory for per-server log files (default: a new temporary directory)')
+    parser.add_argument('--log-lines', type=int, default=50,
+                        help='Lines of server output shown when a server fails or the command fails (default: 50)')
+    parser.add_argument('--load', metavar='SCENARIO',
+                        help='Drive the servers with the built-in HTTP load generator (JSON scenario, see '
+                             'load_generator.py); the command becomes optional and runs afterwards if given')
+    parser.add_argument('--load-output', metavar='FILE', help='Write load test results as JSON to FILE')
+    parser.add_argument('--report', metavar='FILE',
+                        help='Write startup, test and shutdown timings per run and server to FILE as JSON')
+    parser.add_argument('--repeat', type=int, default=1, metavar='N',
+                        help='Run the whole start/test/stop cycle N times, stopping at the first failure, '
+                             'and summarize timings as min/median/max (default: 1)')
     parser.add_argument('command', nargs=argparse.REMAINDER, help='Command to run after server(s) ready')
 
     args = parser.parse_args()
@@ -45,7 +882,7 @@ def main():
     if args.command and args.command[0] == '--':
         args.command = args.command[1:]
 
-    if not args.command:
+    if not args.command and not args.load:
         print("Error: No command specified to run")
         sys.exit(1)
 
@@ -54,52 +891,59 @@ def main():
         print("Error: Number of --server and --port arguments must match")
         sys.exit(1)
 
-    servers = []
-    for cmd, port in zip(args.servers, args.ports):
-        servers.append({'cmd': cmd, 'port': port})
-
-    server_processes = []
-
     try:
-        # Start all servers
-        for i, server in enumerate(servers):
-            print(f"Starting server {i+1}/{len(servers)}: {server['cmd']}")
-
-            # Use shell=True to support commands with cd and &&
-            process = subprocess.Popen(
-                server['cmd'],
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            server_processes.append(process)
-
-            # Wait for this server to be ready
-            print(f"Waiting for server on port {server['port']}...")
-            if not is_server_ready(server['port'], timeout=args.timeout):
-                raise RuntimeError(f"Server failed to start on port {server['port']} within {args.timeout}s")
-
-            print(f"Server ready on port {server['port']}")
+        after = parse_dependencies(args.after, len(args.servers))
+        probes = parse_probes(args.ready, len(args.servers))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-        print(f"\nAll {len(servers)} server(s) ready")
+    if args.shards < 1:
+        print("Error: --shards must be at least 1")
+        sys.exit(1)
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1")
+        sys.exit(1)
+    if args.reuse and None in args.ports:
+        print("Error: --port auto cannot be combined with --reuse (warm servers are found by their port)")
+        sys.exit(1)
+    if args.shards > 1 and args.reuse:
+        print("Error: --reuse cannot be combined with --shards (sharded servers run on fresh ports)")
+        sys.exit(1)
+    if args.load:
+        # Check the scenario before starting servers; real ports are filled in for each run
+        values = placeholder_values([port or 1 for port in args.ports], 1, args.shards)
+        try:
+            load_generator.load_scenario(args.load, lambda text: expand(text, values))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
 
-        # Run the command
-        print(f"Running: {' '.join(args.command)}\n")
-        result = subprocess.run(args.command)
-        sys.exit(result.returncode)
+    log_dir = Path(args.log_dir or tempfile.mkdtemp(prefix='with_server-'))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Server logs: {log_dir}")
 
+    records = []
+    code = 1
+    try:
+        for run in range(1, args.repeat + 1):
+            run_log_dir = log_dir / f"run-{run}" if args.repeat > 1 else log_dir
+            if args.shards > 1:
+                code = run_shards(args, after, probes, run_log_dir, records, run, args.repeat)
+            else:
+                code = run_once(args, after, probes, run_log_dir, records, run, args.repeat)
+            if code != 0:
+                if run < args.repeat:
+                    print(f"Run {run} failed; not repeating")
+                break
     finally:
-        # Clean up all servers
-        print(f"\nStopping {len(server_processes)} server(s)...")
-        for i, process in enumerate(server_processes):
-            try:
-                process.terminate()
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-                process.wait()
-            print(f"Server {i+1} stopped")
-        print("All servers stopped")
+        if len(records) > 1:
+            title = f"{len(records) // args.shards} run(s)" + (f" x {args.shards} shards" if args.shards > 1 else '')
+            timing_report.print_summary(timing_report.summarize(records), title)
+        if args.report:
+            timing_report.write_report(args.report, records, sys.argv)
+            print(f"Timing report: {args.report}")
+    sys.exit(code)
 
 
 if __name__ == '__main__':